@@ -0,0 +1,135 @@
+import re
+
+ARABIC_DIGITS_TABLE = str.maketrans('٠١٢٣٤٥٦٧٨٩', '0123456789')
+ARABIC_LETTER_FOLDING = {
+    'إ': 'ا',
+    'أ': 'ا',
+    'آ': 'ا',
+    'ى': 'ي',
+    'ة': 'ه',
+    # Hamza on a carrier is spelled either way (مسؤولية، مسئولية); both fold to the bare hamza.
+    'ؤ': 'ء',
+    'ئ': 'ء',
+}
+TASHKEEL_RANGE = (0x064B, 0x0652)
+
+_REPEAT_RE = re.compile(r'(.)\1\1+')
+_NON_BMP_RE = re.compile('[\U00010000-\U0010FFFF]')
+_SPACES_RE = re.compile(r' {2,}')
+_WORD_CHAR_RE = re.compile(r'\w')
+_SPACE_CHAR_RE = re.compile(r'\s')
+
+
+def _normalized_char(ch):
+    code = ord(ch)
+    if ch in ARABIC_LETTER_FOLDING:
+        return ARABIC_LETTER_FOLDING[ch]
+    if TASHKEEL_RANGE[0] <= code <= TASHKEEL_RANGE[1]:
+        return None
+    if _SPACE_CHAR_RE.match(ch):
+        return ' '
+    if _WORD_CHAR_RE.match(ch):
+        return ch
+    return None
+
+
+class _NormalizationTable(dict):
+    def __missing__(self, code):
+        value = self[code] = _normalized_char(chr(code))
+        return value
+
+
+# One str.translate table folds letter variants, drops tashkeel and
+# punctuation and maps whitespace to ' '. The list covers the BMP (fast
+# indexed lookups); texts with astral characters use the lazy dict.
+NORMALIZATION_TABLE = _NormalizationTable()
+BMP_NORMALIZATION_TABLE = [_normalized_char(chr(code)) for code in range(0x10000)]
+
+
+def normalize_arabic_numbers(text):
+    return text.translate(ARABIC_DIGITS_TABLE)
+
+
+def normalize_arabic_text(text):
+    text = _REPEAT_RE.sub(r'\1', text)
+    text = text.translate(NORMALIZATION_TABLE if _NON_BMP_RE.search(text) else BMP_NORMALIZATION_TABLE)
+    return _SPACES_RE.sub(' ', text).strip(' ')
+
+
+def normalize_arabic_text_with_offsets(text):
+    """normalize_arabic_text() with, per output character, its source span [start, end) in ``text``.
+
+    A collapsed run of repeated characters maps to the whole run.
+    """
+    kept = []
+    last = 0
+    for m in _REPEAT_RE.finditer(text):
+        kept.extend((i, i + 1) for i in range(last, m.start()))
+        kept.append((m.start(), m.end()))
+        last = m.end()
+    kept.extend((i, i + 1) for i in range(last, len(text)))
+    chars = []
+    offsets = []
+    ends = []
+    for i, end in kept:
+        ch = NORMALIZATION_TABLE[ord(text[i])]
+        if ch is None:
+            continue
+        if ch == ' ' and (not chars or chars[-1] == ' '):
+            continue
+        chars.append(ch)
+        offsets.append(i)
+        ends.append(end)
+    if chars and chars[-1] == ' ':
+        chars.pop()
+        offsets.pop()
+        ends.pop()
+    return "".join(chars), offsets, ends
+
+
+# Light stemming on normalized tokens (after the Light10 stemmer): an
+# optional conjunction (و، ف) and preposition (ب، ل، ك), one article prefix
+# and the common suffixes are stripped.
+STEM_CONJUNCTIONS = 'وف'
+STEM_PROCLITICS = 'بلك'
+STEM_PREFIXES = ('وال', 'بال', 'كال', 'فال', 'لل', 'ال')
+STEM_SUFFIXES = ('ها', 'ان', 'ات', 'ون', 'ين', 'يه', 'ه', 'ي')
+STEM_MIN_BASE = 3
+_BROKEN_PLURAL_VOWELS = 'اوي'
+
+
+def _proclitic_readings(token):
+    # A leading و/ف/ب/ل/ك may be a clitic or a root letter (وصية، فصل، بيع، لجنة), so both readings are kept.
+    readings = [token]
+    if token[:1] in STEM_CONJUNCTIONS and len(token) > STEM_MIN_BASE:
+        readings.append(token[1:])
+    for reading in list(readings):
+        if reading[:1] in STEM_PROCLITICS and len(reading) > STEM_MIN_BASE:
+            readings.append(reading[1:])
+    return readings
+
+
+def arabic_stem(token):
+    """Stem of a normalized token read without clitics, so "العقود" and "عقدين" give "عقد"."""
+    for prefix in STEM_PREFIXES:
+        if token.startswith(prefix) and len(token) - len(prefix) >= 2:
+            token = token[len(prefix):]
+            break
+    for suffix in STEM_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 2 and len(token) > 3:
+            token = token[:-len(suffix)]
+    if len(token) == 4:
+        # Four-letter patterns with a long vowel (فعول، فعال، فعيل، فاعل) reduce to the three root letters.
+        if token[2] in _BROKEN_PLURAL_VOWELS:
+            token = token[:2] + token[3]
+        elif token[1] == 'ا':
+            token = token[0] + token[2:]
+    return token
+
+
+def arabic_stems(token):
+    """Stems of each clitic reading of a normalized token.
+
+    "بعقد" gives "بعقد" and "عقد"; "وصيه" gives "وص" (the stem of "الوصيه") and "صيه".
+    """
+    return tuple(dict.fromkeys(arabic_stem(reading) for reading in _proclitic_readings(token)))
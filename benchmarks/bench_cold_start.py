@@ -0,0 +1,92 @@
+"""Time for a fresh process to answer its first search.
+
+    python benchmarks/bench_cold_start.py --scale 10
+
+Compares parsing the DOCX files, loading the warm SQLite corpus cache and
+mapping a prebuilt index artifact (python law_corpus.py build-index). Each
+start runs in a new process, so the timings include nothing cached in
+memory except the OS page cache.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from law_corpus import CorpusStore, build_index_artifact
+from law_search import build_query, run_query
+
+from bench_suite import peak_rss_mb
+from make_scaled_corpus import make_scaled_corpus
+
+FIRST_QUERY = "إيجار"
+MODES = ("docx", "sqlite", "artifact")
+
+
+def rss_mb():
+    # Current rather than peak RSS: Linux carries ru_maxrss over from the forking parent.
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1 << 20)
+    except OSError:
+        return peak_rss_mb()
+
+
+def first_search(laws_dir, db_path, artifact_path):
+    start = time.perf_counter()
+    corpus = CorpusStore(laws_dir, db_path, artifact_path=artifact_path).snapshot()
+    ready = time.perf_counter()
+    response = run_query(corpus, build_query(FIRST_QUERY))
+    done = time.perf_counter()
+    return {
+        "ready_ms": (ready - start) * 1000,
+        "first_query_ms": (done - ready) * 1000,
+        "hits": response.total,
+        "rss_mb": rss_mb(),
+    }
+
+
+def run_child(mode, laws_dir, tmp):
+    db_path = os.path.join(tmp, f"{mode}.db") if mode == "docx" else os.path.join(tmp, "corpus.db")
+    artifact_path = os.path.join(tmp, "laws_index.bin") if mode == "artifact" else None
+    start = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, __file__, "--child", mode, laws_dir, db_path, artifact_path or ""],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return dict(process_ms=(time.perf_counter() - start) * 1000, **json.loads(out))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="First-search latency of a fresh process.")
+    parser.add_argument("--laws-dir", default="laws")
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--child", nargs=4, metavar=("MODE", "LAWS_DIR", "DB", "ARTIFACT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _, laws_dir, db_path, artifact_path = args.child
+        print(json.dumps(first_search(laws_dir, db_path, artifact_path or None)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        laws_dir = args.laws_dir
+        if args.scale != 1:
+            laws_dir = os.path.join(tmp, "laws")
+            make_scaled_corpus(args.laws_dir, laws_dir, args.scale)
+        build_index_artifact(laws_dir, os.path.join(tmp, "laws_index.bin"), os.path.join(tmp, "corpus.db"))
+        print(f"x{args.scale}, artifact {os.path.getsize(os.path.join(tmp, 'laws_index.bin')) / 1e6:.1f} MB")
+        for mode in MODES:
+            run = run_child(mode, laws_dir, tmp)
+            print(f"  {mode}: process {run['process_ms']:.0f} ms, corpus ready {run['ready_ms']:.1f} ms, "
+                  f"first query {run['first_query_ms']:.2f} ms ({run['hits']} hits), "
+                  f"RSS {run['rss_mb']:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
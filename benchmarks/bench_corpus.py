@@ -0,0 +1,78 @@
+import argparse
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document
+
+from arabic_text import normalize_arabic_text
+from law_corpus import law_articles, list_law_files, load_corpus
+
+QUERIES = ["إيجار", "التقادم", "الطلاق", "المحكمة", "عقد البيع"]
+
+
+def legacy_search(laws_dir, files, kw):
+    norm_kw = normalize_arabic_text(kw)
+    hits = 0
+    for file in files:
+        doc = Document(os.path.join(laws_dir, file))
+        current = []
+        for para in doc.paragraphs:
+            txt = para.text.strip()
+            if not txt:
+                continue
+            if re.match(r"مادة\s*[\(]?\s*(\d+)[\)]?", txt) and current:
+                if norm_kw in normalize_arabic_text("\n".join(current)):
+                    hits += 1
+                current = []
+            current.append(txt)
+        if current and norm_kw in normalize_arabic_text("\n".join(current)):
+            hits += 1
+    return hits
+
+
+def corpus_search(corpus, files, kw):
+    norm_kw = normalize_arabic_text(kw)
+    return sum(
+        1 for file in files for article in law_articles(corpus, file) if norm_kw in article["norm"]
+    )
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    value = fn(*args)
+    return time.perf_counter() - start, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-query latency: re-parsing DOCX vs. persisted corpus.")
+    parser.add_argument("--laws-dir", default="laws")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=None, help="ingestion processes (default: all cores)")
+    args = parser.parse_args()
+
+    files = list_law_files(args.laws_dir)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "corpus.db")
+        cold, corpus = timed(load_corpus, args.laws_dir, db_path, args.workers)
+        warm, corpus = timed(load_corpus, args.laws_dir, db_path, args.workers)
+    print(f"corpus build (cold): {cold * 1000:.1f} ms, reload from db (warm): {warm * 1000:.1f} ms, "
+          f"{len(corpus['articles'])} articles")
+
+    for kw in QUERIES:
+        legacy = [timed(legacy_search, args.laws_dir, files, kw) for _ in range(args.repeat)]
+        current = [timed(corpus_search, corpus, files, kw) for _ in range(args.repeat)]
+        assert legacy[0][1] == current[0][1], (kw, legacy[0][1], current[0][1])
+        before = statistics.median(t for t, _ in legacy)
+        after = statistics.median(t for t, _ in current)
+        print(f"{kw}: {current[0][1]} hits, before {before * 1000:.1f} ms, after {after * 1000:.2f} ms "
+              f"({before / after:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from law_corpus import iter_docx_paragraphs, list_law_files
+
+
+def python_docx_paragraphs(path):
+    from docx import Document
+
+    for para in Document(path).paragraphs:
+        yield para.text
+
+
+def peak_rss_kb():
+    # VmHWM starts afresh at exec; ru_maxrss would carry over the parent's peak on Linux.
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // (1024 if sys.platform == "darwin" else 1)
+
+
+EXTRACTORS = {
+    "python-docx": python_docx_paragraphs,
+    "iterparse": iter_docx_paragraphs,
+}
+
+
+def run_extractor(name, laws_dir, repeat):
+    extractor = EXTRACTORS[name]
+    paths = [os.path.join(laws_dir, f) for f in list_law_files(laws_dir)]
+    size = sum(os.path.getsize(p) for p in paths)
+    start = time.perf_counter()
+    paragraphs = 0
+    for _ in range(repeat):
+        for path in paths:
+            paragraphs += sum(1 for _ in extractor(path))
+    elapsed = time.perf_counter() - start
+    return {
+        "extractor": name,
+        "seconds": elapsed / repeat,
+        "mb_per_s": size / (1 << 20) / (elapsed / repeat),
+        "paragraphs": paragraphs // repeat,
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+
+def check_equivalence(laws_dir):
+    for file in list_law_files(laws_dir):
+        path = os.path.join(laws_dir, file)
+        expected = list(python_docx_paragraphs(path))
+        assert list(iter_docx_paragraphs(path)) == expected, file
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput and peak RSS of DOCX paragraph extraction.")
+    parser.add_argument("--laws-dir", default="laws")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--child", choices=sorted(EXTRACTORS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_extractor(args.child, args.laws_dir, args.repeat)))
+        return
+
+    for name in EXTRACTORS:
+        # One process per extractor so peak RSS is not shared between them.
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", name, "--laws-dir", args.laws_dir, "--repeat", str(args.repeat)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        r = json.loads(out)
+        print(f"{name}: {r['seconds'] * 1000:.0f} ms per pass, {r['mb_per_s']:.1f} MB/s, "
+              f"{r['paragraphs']} paragraphs, peak RSS {r['peak_rss_kb'] / 1024:.1f} MB")
+    # After the children: this loads every law through python-docx in this process.
+    check_equivalence(args.laws_dir)
+    print(f"iterparse output matches python-docx on every file in {args.laws_dir}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import argparse
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arabic_text import normalize_arabic_text, normalize_arabic_text_with_offsets
+from law_corpus import load_corpus
+
+
+def legacy_normalize_arabic_text(text):
+    text = re.sub(r'(.)\1{2,}', r'\1', text)
+    text = re.sub(r'[\u064B-\u0652]', '', text)
+    text = re.sub('[إأآا]', 'ا', text)
+    text = re.sub('[ىي]', 'ي', text)
+    text = re.sub('[ة]', 'ه', text)
+    text = re.sub('ؤ', 'و', text)
+    text = re.sub('ئ', 'ي', text)
+    text = re.sub(r'[^\w\s]', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark for normalize_arabic_text (equivalence is in tests/test_arabic_text.py).")
+    parser.add_argument("--laws-dir", default="laws")
+    parser.add_argument("--number", type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.laws_dir)
+    texts = [a["plain"] for a in corpus["articles"]]
+    for name, fn in (
+        ("legacy re.sub chain", legacy_normalize_arabic_text),
+        ("translate table", normalize_arabic_text),
+        ("with offset map", normalize_arabic_text_with_offsets),
+    ):
+        seconds = min(timeit.repeat(lambda: [fn(t) for t in texts], number=1, repeat=args.number))
+        print(f"{name}: {seconds * 1000:.1f} ms for the whole corpus ({seconds / len(texts) * 1e6:.1f} us/article)")
+
+
+if __name__ == "__main__":
+    main()
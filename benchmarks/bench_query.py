@@ -0,0 +1,86 @@
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from law_corpus import CorpusStore
+from law_query import evaluate_query, parse_query
+from law_search import build_query, run_query
+
+QUERIES = [
+    "ايجار OR بيع , هبة",
+    "ايجار AND فسخ",
+    "عقد AND NOT بيع",
+    '"عقد البيع" AND -منقول',
+    "المؤجر NEAR/5 المستاجر",
+    "(ايجار OR بيع) AND المحكمة NOT جنائي",
+    "زوج NEAR/3 طلاق NEAR/10 نفقه",
+]
+
+
+def regex_starts(norm, kw, exact_match):
+    # Token index of each (possibly overlapping) occurrence.
+    pattern = rf"(?<!\S)(?={re.escape(kw)}(?!\S))" if exact_match else f"(?={re.escape(kw)})"
+    return sorted({norm.count(" ", 0, m.start()) for m in re.finditer(pattern, norm)})
+
+
+def regex_eval(norm, node, exact_match):
+    """Reference evaluation of a parsed query against one article's text."""
+    kind = node[0]
+    if kind == "term":
+        return bool(regex_starts(norm, node[1], exact_match))
+    if kind == "not":
+        return not regex_eval(norm, node[1], exact_match)
+    if kind == "or":
+        return any(regex_eval(norm, child, exact_match) for child in node[1:])
+    if kind == "and":
+        return all(regex_eval(norm, child, exact_match) for child in node[1:])
+    _, distance, (_, a), (_, b) = node
+    a_len, b_len = a.count(" ") + 1, b.count(" ") + 1
+    return any(
+        max(sb - (sa + a_len - 1), sa - (sb + b_len - 1)) <= distance
+        for sa in regex_starts(norm, a, exact_match)
+        for sb in regex_starts(norm, b, exact_match)
+    )
+
+
+def regex_search(corpus, node, exact_match):
+    return {i for i, article in enumerate(corpus["articles"]) if regex_eval(article["norm"], node, exact_match)}
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    value = fn(*args)
+    return time.perf_counter() - start, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Boolean/proximity queries: postings vs. per-article regex.")
+    parser.add_argument("--laws-dir", default="laws")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = CorpusStore(args.laws_dir).snapshot()
+    index = corpus["index"]
+    for text in QUERIES:
+        node = parse_query(text)
+        for exact_match in (False, True):
+            before = [timed(regex_search, corpus, node, exact_match) for _ in range(args.repeat)]
+            after = [timed(evaluate_query, index, node, exact_match) for _ in range(args.repeat)]
+            assert before[0][1] == after[0][1], (text, exact_match)
+            regex_ms = statistics.median(t for t, _ in before) * 1000
+            postings_ms = statistics.median(t for t, _ in after) * 1000
+            print(f"{text} (exact={exact_match}): {len(after[0][1])} hits, regex {regex_ms:.1f} ms, "
+                  f"postings {postings_ms:.2f} ms ({regex_ms / postings_ms:.0f}x)")
+
+    broad = run_query(corpus, build_query("ايجار, عقد, فسخ"))
+    narrow = run_query(corpus, build_query("ايجار AND عقد AND فسخ"))
+    print(f"OR list: {broad.total} results; AND query: {narrow.total} results")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Reproducible benchmark suite over the bundled laws (and scaled-up copies).
+
+    python benchmarks/bench_suite.py --scales 1,10 -o report.json
+    python benchmarks/bench_suite.py --scales 1,10 -o new.json --compare report.json
+
+Each scale runs in its own process so peak RSS is per scale. The report is
+JSON: environment metadata plus one entry per scale with ingestion,
+per-query, highlighting and Word export timings.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from law_corpus import load_corpus
+from law_export import export_results_to_word
+from law_highlight import highlight_keywords
+from law_index import MATCH_STEM, build_index
+from law_search import ORDER_RELEVANCE, build_query, run_query
+
+from bench_docx_extract import peak_rss_kb
+from make_scaled_corpus import make_scaled_corpus
+
+REPORT_FORMAT = 1
+EXPORT_ARTICLES = 500
+QUERY_SET = [
+    ("keyword", "إيجار", {}),
+    ("keyword_phrase", "عقد البيع", {}),
+    ("keyword_list", "الطلاق, النفقة, الحضانة", {}),
+    ("exact", "المحكمة", {"exact": True}),
+    ("exact_phrase", "عقد البيع", {"exact": True}),
+    ("article_number", "", {"article": "10-15"}),
+    ("boolean", "ايجار AND فسخ", {}),
+    ("stem", "العقود", {"morphology": MATCH_STEM}),
+    ("ranked", "التقادم", {"order": ORDER_RELEVANCE, "limit": 50}),
+]
+HIGHLIGHT_QUERY = "keyword_list"
+EXPORT_QUERY = "exact"
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    value = fn(*args, **kwargs)
+    return time.perf_counter() - start, value
+
+
+def peak_rss_mb():
+    # This process's own peak (VmHWM), not the forking parent's that ru_maxrss carries over.
+    return peak_rss_kb() / 1024
+
+
+def run_scale(laws_dir, repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "corpus.db")
+        ingest_cold, corpus = timed(load_corpus, laws_dir, db_path)
+        ingest_warm, corpus = timed(load_corpus, laws_dir, db_path)
+    index_build, corpus["index"] = timed(build_index, corpus["articles"])
+
+    queries = {}
+    responses = {}
+    for name, text, options in QUERY_SET:
+        q = build_query(text, **options)
+        times = []
+        for _ in range(repeat):
+            elapsed, responses[name] = timed(run_query, corpus, q)
+            times.append(elapsed)
+        times.sort()
+        queries[name] = {
+            "median_ms": statistics.median(times) * 1000,
+            "p95_ms": times[min(len(times) - 1, int(len(times) * 0.95))] * 1000,
+            "hits": responses[name].total,
+        }
+
+    response = responses[HIGHLIGHT_QUERY]
+    texts = [corpus["articles"][i]["plain"] for i in response.article_ids]
+    keywords = response.query.normalized_keywords
+    highlight_s, _ = timed(lambda: [highlight_keywords(t, keywords) for t in texts])
+
+    articles = [corpus["articles"][i] for i in responses[EXPORT_QUERY].article_ids[:EXPORT_ARTICLES]]
+    export_s, docx = timed(export_results_to_word, articles)
+
+    return {
+        "files": len(corpus["files"]),
+        "articles": len(corpus["articles"]),
+        "ingest_cold_s": ingest_cold,
+        "ingest_warm_s": ingest_warm,
+        "index_build_s": index_build,
+        "queries": queries,
+        "highlight": {"articles": len(texts), "total_ms": highlight_s * 1000},
+        "export": {"articles": len(articles), "ms": export_s * 1000, "bytes": len(docx)},
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(run, prefix=""):
+    values = {}
+    for key, value in run.items():
+        if isinstance(value, dict):
+            values.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and key.endswith(("_s", "_ms", "_mb")):
+            values[prefix + key] = value
+    return values
+
+
+def compare(report, baseline):
+    base_runs = {run["scale"]: run for run in baseline["runs"]}
+    for run in report["runs"]:
+        base = base_runs.get(run["scale"])
+        if base is None:
+            continue
+        print(f"scale x{run['scale']} vs baseline {baseline['meta'].get('commit')}:")
+        old = flatten(base)
+        for key, value in flatten(run).items():
+            if key in old and old[key]:
+                print(f"  {key}: {old[key]:.2f} -> {value:.2f} ({value / old[key]:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ingestion, queries, highlighting and export.")
+    parser.add_argument("--laws-dir", default="laws")
+    parser.add_argument("--scales", default="1,10", help="comma-separated corpus replication factors")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("-o", "--output", default="bench_report.json")
+    parser.add_argument("--compare", metavar="BASELINE", help="print ratios against an earlier report")
+    parser.add_argument("--child", metavar="LAWS_DIR", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_scale(args.child, args.repeat)))
+        return
+
+    runs = []
+    for scale in (int(s) for s in args.scales.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            laws_dir = args.laws_dir
+            if scale != 1:
+                laws_dir = os.path.join(tmp, "laws")
+                make_scaled_corpus(args.laws_dir, laws_dir, scale)
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", laws_dir, "--repeat", str(args.repeat)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+        run = dict(scale=scale, **json.loads(out))
+        runs.append(run)
+        print(f"x{scale}: {run['articles']} articles, cold ingest {run['ingest_cold_s']:.2f} s, "
+              f"index {run['index_build_s']:.2f} s, peak RSS {run['peak_rss_mb']:.0f} MB")
+        for name, q in run["queries"].items():
+            print(f"  {name}: {q['hits']} hits, median {q['median_ms']:.2f} ms, p95 {q['p95_ms']:.2f} ms")
+        print(f"  highlight {run['highlight']['articles']} articles: {run['highlight']['total_ms']:.1f} ms; "
+              f"export {run['export']['articles']} articles: {run['export']['ms']:.1f} ms")
+
+    report = {
+        "format": REPORT_FORMAT,
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "repeat": args.repeat,
+        },
+        "runs": runs,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"report written to {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
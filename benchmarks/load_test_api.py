@@ -0,0 +1,123 @@
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from urllib.parse import quote
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+QUERIES = ["إيجار", "التقادم", "الطلاق", "المحكمة", "عقد البيع"]
+
+
+def request_paths():
+    paths = [f"/search?q={quote(q)}&limit=20" for q in QUERIES]
+    paths += [f"/search?q={quote(q)}&order=relevance&limit=20" for q in QUERIES]
+    paths.append("/laws")
+    return paths
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = 0
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"content-length":
+            length = int(value)
+    if length:
+        await reader.readexactly(length)
+    return status
+
+
+async def connection(host, port, paths, deadline, latencies, statuses, offset, etags):
+    reader, writer = await asyncio.open_connection(host, port)
+    i = offset
+    try:
+        while time.perf_counter() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            extra = f"If-None-Match: {etags}\r\n" if etags else ""
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n{extra}\r\n".encode("ascii"))
+            start = time.perf_counter()
+            await writer.drain()
+            status = await read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, concurrency, duration, etag):
+    paths = request_paths()
+    latencies = []
+    statuses = {}
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        connection(host, port, paths, deadline, latencies, statuses, n, etag) for n in range(concurrency)
+    ))
+    return time.perf_counter() - start, latencies, statuses
+
+
+async def wait_for_server(host, port, timeout=120):
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            writer.write(f"GET /health HTTP/1.1\r\nHost: {host}\r\n\r\n".encode("ascii"))
+            await writer.drain()
+            if await read_response(reader) == 200:
+                writer.close()
+                return
+            writer.close()
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+        await asyncio.sleep(0.5)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep-alive HTTP load test for law_api.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("-c", "--concurrency", type=int, default=32, help="concurrent connections")
+    parser.add_argument("-d", "--duration", type=float, default=10.0, help="seconds per run")
+    parser.add_argument("--spawn", action="store_true", help="start uvicorn law_api:app for the run")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes with --spawn")
+    parser.add_argument("--if-none-match", default="", help="send this ETag to measure 304 revalidation")
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "law_api:app", "--host", args.host, "--port", str(args.port),
+             "--workers", str(args.workers), "--log-level", "warning"],
+            cwd=ROOT,
+        )
+    try:
+        asyncio.run(wait_for_server(args.host, args.port))
+        elapsed, latencies, statuses = asyncio.run(
+            run_load(args.host, args.port, args.concurrency, args.duration, args.if_none_match)
+        )
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print(f"{len(latencies)} requests over {args.concurrency} connections in {elapsed:.1f} s: "
+          f"{len(latencies) / elapsed:.0f} req/s")
+    print("status codes: " + ", ".join(f"{code}={n}" for code, n in sorted(statuses.items())))
+    print(f"latency ms: mean {statistics.mean(latencies) * 1000:.1f}, p50 {percentile(latencies, 50) * 1000:.1f}, "
+          f"p95 {percentile(latencies, 95) * 1000:.1f}, p99 {percentile(latencies, 99) * 1000:.1f}")
+
+
+if __name__ == "__main__":
+    main()
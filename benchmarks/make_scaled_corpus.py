@@ -0,0 +1,36 @@
+import argparse
+import os
+import shutil
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from law_corpus import list_law_files
+
+COPY_SUFFIX = " - نسخة {n}"
+
+
+def make_scaled_corpus(laws_dir, out_dir, factor):
+    """Copy every law file ``factor`` times into ``out_dir``; each copy is a distinct law."""
+    os.makedirs(out_dir, exist_ok=True)
+    files = list_law_files(laws_dir)
+    for file in files:
+        stem, ext = os.path.splitext(file)
+        for n in range(factor):
+            name = file if n == 0 else f"{stem}{COPY_SUFFIX.format(n=n + 1)}{ext}"
+            shutil.copyfile(os.path.join(laws_dir, file), os.path.join(out_dir, name))
+    return len(files) * factor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replicate the laws corpus to N times its size.")
+    parser.add_argument("out_dir")
+    parser.add_argument("--factor", type=int, default=10)
+    parser.add_argument("--laws-dir", default="laws")
+    args = parser.parse_args()
+    count = make_scaled_corpus(args.laws_dir, args.out_dir, args.factor)
+    print(f"{count} law files written to {args.out_dir}/")
+
+
+if __name__ == "__main__":
+    main()
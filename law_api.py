@@ -0,0 +1,228 @@
+"""Read-only HTTP/JSON API over the shared law corpus (plain ASGI app).
+
+Run locally with:
+
+    uvicorn law_api:app --host 127.0.0.1 --port 8000 --workers 4
+
+Endpoints:
+    GET /health
+    GET /metrics                        Prometheus text format
+    GET /laws
+    GET /laws/{law}                     full law, article by article
+    GET /laws/{law}/articles/{number}   article lookup (Arabic-Indic digits ok)
+    GET /search?q=..&law=..&exact=1&match=stem|fuzzy&article=..&order=relevance&limit=..&highlight=1
+"""
+import asyncio
+import hashlib
+import json
+import time
+from urllib.parse import parse_qs, unquote
+
+from arabic_text import normalize_arabic_numbers
+from law_corpus import law_articles, law_name_from_file
+from law_index import MATCH_FUZZY, MATCH_STEM
+from law_metrics import METRICS
+from law_query import QuerySyntaxError
+from law_search import (
+    DEFAULT_LAWS_DIR,
+    ORDER_DOCUMENT,
+    ORDER_RELEVANCE,
+    build_query,
+    cached_run_query,
+    default_query_cache,
+    default_store,
+    response_results,
+)
+
+API_CACHE_MAX_AGE = 300
+TRUE_VALUES = {"1", "true", "yes", "on"}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _article_json(article_id, article, text=None):
+    return {
+        "article_id": article_id,
+        "law": article["law"],
+        "num": article["num"],
+        "text": article["plain"] if text is None else text,
+    }
+
+
+def _law_file(corpus, law):
+    by_name = {law_name_from_file(f): f for f in corpus["files"]}
+    file = by_name.get(law, law)
+    if file not in corpus["law_ranges"]:
+        raise ApiError(404, f"unknown law: {law}")
+    if file in corpus["errors"]:
+        raise ApiError(503, f"law file could not be read: {corpus['errors'][file]}")
+    return file
+
+
+def handle_laws(corpus, params):
+    return {
+        "laws": [
+            {
+                "law": law_name_from_file(f),
+                "file": f,
+                "articles": corpus["law_ranges"][f][1] - corpus["law_ranges"][f][0],
+                "error": corpus["errors"].get(f),
+            }
+            for f in corpus["files"]
+        ]
+    }
+
+
+def handle_law(corpus, params, law):
+    file = _law_file(corpus, law)
+    start = corpus["law_ranges"][file][0]
+    return {
+        "law": law_name_from_file(file),
+        "articles": [_article_json(start + i, a) for i, a in enumerate(law_articles(corpus, file))],
+    }
+
+
+def handle_article(corpus, params, law, number):
+    file = _law_file(corpus, law)
+    hits = corpus["index"]["articles_by_num"].get((law_name_from_file(file), normalize_arabic_numbers(number)), [])
+    if not hits:
+        raise ApiError(404, f"no article {number} in {law}")
+    return {"articles": [_article_json(i, corpus["articles"][i]) for i in hits]}
+
+
+def handle_search(corpus, params):
+    def flag(name):
+        return params.get(name, [""])[0].lower() in TRUE_VALUES
+
+    q = params.get("q", [""])[0]
+    article = params.get("article", [""])[0]
+    if not q.strip() and not article.strip():
+        raise ApiError(400, "q or article is required")
+    try:
+        limit = int(params["limit"][0]) if "limit" in params else None
+    except ValueError:
+        raise ApiError(400, "limit must be an integer")
+    if limit is not None and limit < 0:
+        raise ApiError(400, "limit must be 0 or more")
+    order = ORDER_RELEVANCE if params.get("order", [""])[0] == ORDER_RELEVANCE else ORDER_DOCUMENT
+    morphology = params.get("match", [""])[0] or None
+    if morphology not in (None, MATCH_STEM, MATCH_FUZZY):
+        raise ApiError(400, "match must be stem or fuzzy")
+    try:
+        query = build_query(q, params.get("law"), flag("exact"), article, order, limit, morphology)
+    except QuerySyntaxError as e:
+        raise ApiError(400, str(e))
+    response = cached_run_query(corpus, query)
+    return {
+        "query": q,
+        "total": response.total,
+        "warnings": response.warnings,
+        "results": [
+            _article_json(r.article_id, corpus["articles"][r.article_id], r.text)
+            for r in response_results(corpus, response, highlight=flag("highlight"))
+        ],
+    }
+
+
+def route(path):
+    parts = [unquote(p) for p in path.strip("/").split("/") if p]
+    if parts == ["health"]:
+        return None, ()
+    if parts == ["metrics"]:
+        return "metrics", ()
+    if parts == ["search"]:
+        return handle_search, ()
+    if parts == ["laws"]:
+        return handle_laws, ()
+    if len(parts) == 2 and parts[0] == "laws":
+        return handle_law, (parts[1],)
+    if len(parts) == 4 and parts[0] == "laws" and parts[2] == "articles":
+        return handle_article, (parts[1], parts[3])
+    raise ApiError(404, "not found")
+
+
+def make_etag(corpus_version, path, query_string):
+    digest = hashlib.sha1(f"{corpus_version}\n{path}?{query_string}".encode("utf-8")).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+class LawApi:
+    def __init__(self, laws_dir=DEFAULT_LAWS_DIR):
+        self.laws_dir = laws_dir
+
+    async def _send_json(self, send, status, body, headers=(), include_body=True):
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8") if body is not None else b""
+        await self._send(send, status, payload, b"application/json; charset=utf-8", headers, include_body)
+
+    async def _send(self, send, status, payload, content_type, headers=(), include_body=True):
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", content_type),
+                (b"content-length", str(len(payload)).encode("ascii")),
+                *headers,
+            ],
+        })
+        await send({"type": "http.response.body", "body": payload if include_body else b""})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await asyncio.to_thread(default_store(self.laws_dir).snapshot)
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+        if scope["method"] not in ("GET", "HEAD"):
+            await self._send_json(send, 405, {"error": "method not allowed"}, [(b"allow", b"GET, HEAD")])
+            return
+        start = time.perf_counter()
+        try:
+            await self._handle(scope, send)
+        finally:
+            METRICS.observe("stage_seconds", time.perf_counter() - start, stage="api_request")
+
+    async def _handle(self, scope, send):
+        try:
+            handler, args = route(scope["path"])
+            if handler == "metrics":
+                payload = METRICS.render_prometheus().encode("utf-8")
+                await self._send(send, 200, payload, b"text/plain; version=0.0.4; charset=utf-8")
+                return
+            corpus = await asyncio.to_thread(default_store(self.laws_dir).snapshot)
+            if handler is None:
+                await self._send_json(send, 200, {
+                    "status": "ok",
+                    "corpus_version": corpus["version"],
+                    "query_cache": default_query_cache().stats(),
+                })
+                return
+            query_string = scope.get("query_string", b"").decode("latin-1")
+            etag = make_etag(corpus["version"], scope["path"], query_string)
+            cache_headers = [
+                (b"etag", etag.encode("ascii")),
+                (b"cache-control", f"public, max-age={API_CACHE_MAX_AGE}".encode("ascii")),
+            ]
+            request_headers = dict(scope.get("headers") or [])
+            if request_headers.get(b"if-none-match", b"").decode("latin-1") == etag:
+                await self._send_json(send, 304, None, cache_headers)
+                return
+            params = parse_qs(query_string)
+            # Searches are CPU-bound; keep the event loop free for other connections.
+            body = await asyncio.to_thread(handler, corpus, params, *args)
+            await self._send_json(send, 200, body, cache_headers, include_body=scope["method"] == "GET")
+        except ApiError as e:
+            await self._send_json(send, e.status, {"error": e.message})
+
+
+app = LawApi()
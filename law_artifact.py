@@ -0,0 +1,292 @@
+"""Single-file, memory-mapped corpus and search index.
+
+The file holds the article buffers of an ArticleStore, the citation graph
+and the search index flattened into typed arrays and sorted string tables.
+open_artifact() maps it read-only and the views below query it in place,
+so opening costs the same for any corpus size and processes on one host
+share the pages.
+
+Layout: ARTIFACT_MAGIC, the format version and header length as
+little-endian uint32, a JSON header with the metadata and the (offset,
+length, typecode) of each section, then the 8-byte aligned sections.
+"""
+import bisect
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
+
+INDEX_ARTIFACT_FILE = "laws_index.bin"
+ARTIFACT_MAGIC = b"LAWINDEX"
+ARTIFACT_FORMAT_VERSION = 4
+ARTIFACT_PREAMBLE = struct.Struct("<8sII")
+SECTION_ALIGN = 8
+KEY_SEPARATOR = "\x00"
+
+
+class StringTable(Sequence):
+    """Strings stored back to back in a UTF-8 buffer, ``offsets`` holding n + 1 bounds."""
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(len(self)))]
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __iter__(self):
+        blob, offsets = self.blob, self.offsets
+        return (str(blob[a:b], "utf-8") for a, b in zip(offsets, offsets[1:]))
+
+    def find(self, key):
+        """Position of ``key`` in a sorted table, or -1."""
+        i = bisect.bisect_left(self, key)
+        return i if i < len(self) and self[i] == key else -1
+
+
+class TokenList(Sequence):
+    def __init__(self, vocab, ids):
+        self.vocab = vocab
+        self.ids = ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.vocab[t] for t in self.ids[i]]
+        return self.vocab[self.ids[i]]
+
+
+class KeyedLists(Mapping):
+    """Sorted string keys, each with a run of integers in ``values``.
+
+    With ``vocab`` the integers are token ids and lookups return TokenLists.
+    """
+
+    def __init__(self, keys, bounds, values, vocab=None):
+        self.keys_table = keys
+        self.bounds = bounds
+        self.values = values
+        self.vocab = vocab
+
+    def _value(self, i):
+        ids = self.values[self.bounds[i]:self.bounds[i + 1]]
+        return ids if self.vocab is None else TokenList(self.vocab, ids)
+
+    def __getitem__(self, key):
+        i = self.keys_table.find(key)
+        if i < 0:
+            raise KeyError(key)
+        return self._value(i)
+
+    def __contains__(self, key):
+        return self.keys_table.find(key) >= 0
+
+    def __iter__(self):
+        return iter(self.keys_table)
+
+    def __len__(self):
+        return len(self.keys_table)
+
+
+class ArticleNumbers(KeyedLists):
+    """articles_by_num over keys "law\\0num"; looked up with (law, num) tuples."""
+
+    def __getitem__(self, key):
+        return super().__getitem__(KEY_SEPARATOR.join(key))
+
+    def __contains__(self, key):
+        return super().__contains__(KEY_SEPARATOR.join(key))
+
+    def __iter__(self):
+        return (tuple(key.split(KEY_SEPARATOR, 1)) for key in self.keys_table)
+
+
+class TokenPostings(Mapping):
+    """{article_id: positions} of one token; article ids are ascending."""
+
+    def __init__(self, docs, position_bounds, positions):
+        self.docs = docs
+        self.position_bounds = position_bounds
+        self.positions = positions
+
+    def _positions(self, k):
+        return self.positions[self.position_bounds[k]:self.position_bounds[k + 1]]
+
+    def __getitem__(self, article_id):
+        k = bisect.bisect_left(self.docs, article_id)
+        if k == len(self.docs) or self.docs[k] != article_id:
+            raise KeyError(article_id)
+        return self._positions(k)
+
+    def __iter__(self):
+        return iter(self.docs)
+
+    def __len__(self):
+        return len(self.docs)
+
+    def items(self):
+        return ((article_id, self._positions(k)) for k, article_id in enumerate(self.docs))
+
+
+class Postings(Mapping):
+    def __init__(self, vocab, doc_bounds, docs, position_bounds, positions):
+        self.vocab = vocab
+        self.doc_bounds = doc_bounds
+        self.docs = docs
+        self.position_bounds = position_bounds
+        self.positions = positions
+
+    def __getitem__(self, token):
+        t = self.vocab.find(token)
+        if t < 0:
+            raise KeyError(token)
+        lo, hi = self.doc_bounds[t], self.doc_bounds[t + 1]
+        return TokenPostings(self.docs[lo:hi], self.position_bounds[lo:hi + 1], self.positions)
+
+    def __contains__(self, token):
+        return self.vocab.find(token) >= 0
+
+    def __iter__(self):
+        return iter(self.vocab)
+
+    def __len__(self):
+        return len(self.vocab)
+
+
+def pack_strings(strings):
+    """(blob, offsets) of a StringTable."""
+    blob = bytearray()
+    offsets = array("I", [0])
+    for s in strings:
+        blob += s.encode("utf-8")
+        offsets.append(len(blob))
+    return bytes(blob), offsets
+
+
+def _keyed_lists(items):
+    """(keys blob, key offsets, bounds, values) for (key, ints) pairs sorted by key."""
+    keys = []
+    bounds = array("I", [0])
+    values = array("I")
+    for key, ints in items:
+        keys.append(key)
+        values.extend(ints)
+        bounds.append(len(values))
+    return pack_strings(keys) + (bounds, values)
+
+
+def pack_index(index):
+    """Sections and metadata for build_index() output."""
+    vocab = index["vocab"]
+    token_ids = {token: t for t, token in enumerate(vocab)}
+    doc_bounds = array("I", [0])
+    docs = array("I")
+    position_bounds = array("I", [0])
+    positions = array("I")
+    for token in vocab:
+        for article_id, token_positions in index["postings"][token].items():
+            docs.append(article_id)
+            positions.extend(token_positions)
+            position_bounds.append(len(positions))
+        doc_bounds.append(len(docs))
+    sections = {"doc_bounds": doc_bounds, "docs": docs, "position_bounds": position_bounds, "positions": positions}
+    sections["vocab"], sections["vocab_offsets"] = pack_strings(vocab)
+    keyed_tables = {
+        "vocab_grams": ((gram, sorted(token_ids[t] for t in tokens)) for gram, tokens in index["vocab_grams"].items()),
+        "stems": ((stem, [token_ids[t] for t in tokens]) for stem, tokens in index["stems"].items()),
+        "vocab_deletes": ((key, [token_ids[t] for t in tokens]) for key, tokens in index["vocab_deletes"].items()),
+        "articles_by_num": ((KEY_SEPARATOR.join(key), ids) for key, ids in index["articles_by_num"].items()),
+    }
+    for name, items in keyed_tables.items():
+        table = _keyed_lists(sorted(items))
+        for suffix, data in zip(("keys", "key_offsets", "bounds", "values"), table):
+            sections[f"{name}_{suffix}"] = data
+    sections["lengths"] = array("I", index["lengths"])
+    meta = {"size": index["size"], "avg_length": index["avg_length"]}
+    return sections, meta
+
+
+def unpack_index(sections, meta):
+    """The index dict of build_index(), backed by the mapped sections."""
+    vocab = StringTable(sections["vocab"], sections["vocab_offsets"])
+
+    def keyed(name, cls=KeyedLists, with_vocab=True):
+        keys = StringTable(sections[f"{name}_keys"], sections[f"{name}_key_offsets"])
+        return cls(keys, sections[f"{name}_bounds"], sections[f"{name}_values"], vocab if with_vocab else None)
+
+    return {
+        "postings": Postings(
+            vocab, sections["doc_bounds"], sections["docs"], sections["position_bounds"], sections["positions"]
+        ),
+        "vocab": vocab,
+        "vocab_grams": keyed("vocab_grams"),
+        "stems": keyed("stems"),
+        "vocab_deletes": keyed("vocab_deletes"),
+        "articles_by_num": keyed("articles_by_num", ArticleNumbers, with_vocab=False),
+        "size": meta["size"],
+        "avg_length": meta["avg_length"],
+        "lengths": sections["lengths"],
+    }
+
+
+def write_artifact(path, meta, sections):
+    """Write the artifact to ``path`` atomically (a temporary file is renamed over it)."""
+    layout = {}
+    offset = 0
+    for name, data in sections.items():
+        size = len(data) * (data.itemsize if isinstance(data, array) else 1)
+        layout[name] = (offset, size, data.typecode if isinstance(data, array) else "B")
+        offset += -(-size // SECTION_ALIGN) * SECTION_ALIGN
+    header = json.dumps(
+        {"meta": meta, "sections": layout, "byteorder": sys.byteorder,
+         "itemsizes": {tc: array(tc).itemsize for tc in "HI"}},
+        ensure_ascii=False,
+    ).encode("utf-8")
+    header += b" " * (-(ARTIFACT_PREAMBLE.size + len(header)) % SECTION_ALIGN)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(ARTIFACT_PREAMBLE.pack(ARTIFACT_MAGIC, ARTIFACT_FORMAT_VERSION, len(header)))
+        f.write(header)
+        for name, data in sections.items():
+            raw = data.tobytes() if isinstance(data, array) else data
+            f.write(raw)
+            f.write(b"\0" * (-len(raw) % SECTION_ALIGN))
+    os.replace(tmp_path, path)
+
+
+def open_artifact(path):
+    """Map ``path`` read-only; returns (meta, {section: memoryview}).
+
+    Raises ValueError when the file is not an artifact this code can read.
+    """
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(mapped) < ARTIFACT_PREAMBLE.size:
+        raise ValueError(f"{path}: truncated index artifact")
+    magic, version, header_len = ARTIFACT_PREAMBLE.unpack_from(mapped)
+    if magic != ARTIFACT_MAGIC or version != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(f"{path}: not a version {ARTIFACT_FORMAT_VERSION} index artifact")
+    base = ARTIFACT_PREAMBLE.size + header_len
+    header = json.loads(bytes(mapped[ARTIFACT_PREAMBLE.size:base]).decode("utf-8"))
+    if header["byteorder"] != sys.byteorder or any(
+        array(tc).itemsize != size for tc, size in header["itemsizes"].items()
+    ):
+        raise ValueError(f"{path}: built on an incompatible platform")
+    view = memoryview(mapped)
+    sections = {}
+    for name, (offset, size, typecode) in header["sections"].items():
+        if base + offset + size > len(mapped):
+            raise ValueError(f"{path}: truncated index artifact")
+        data = view[base + offset:base + offset + size]
+        sections[name] = data if typecode == "B" else data.cast(typecode)
+    return header["meta"], sections
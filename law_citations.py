@@ -0,0 +1,150 @@
+"""References between articles ("المادة (45)", "المادتين السابقتين",
+"المادة (12) من القانون المدني") and the citation graph built from them.
+
+extract_citations() runs at ingestion and keeps, per article, the
+referenced (article number, law phrase) pairs; the phrase is "" for the
+article's own law. build_citation_graph() resolves them against the loaded
+corpus into two adjacency arrays, so cited and citing articles are a slice
+lookup.
+"""
+import re
+from array import array
+
+from arabic_text import normalize_arabic_numbers, normalize_arabic_text
+
+CITATION_SECTIONS = ("cites_bounds", "cites", "cited_by_bounds", "cited_by")
+CITATION_MAX_RANGE = 50
+CITATION_SCAN_CHARS = 200
+CITATION_STRIP_RE = re.compile("[\u0640\u064B-\u0652]")  # tatweel and tashkeel
+CITATION_KEYWORD_RE = re.compile(r"(?<!\w)(?P<prefix>[وفبلك]{0,2})(?P<article>ال)?(?P<kind>مادت[اي]ن|ماد[ةه]|مواد)(?!\w)")
+CITATION_NUMBERS_RE = re.compile(
+    r"\s*(?:رقم\s*)?(?:من\s+)?\(?\s*\d+\s*\)?(?:\s*(?:،|,|-|–|و|او|أو|إلى|الى|حتى)\s*\(?\s*\d+\s*\)?)*"
+)
+CITATION_NUMBER_RE = re.compile(r"(?P<sep>،|,|-|–|إلى|الى|حتى)?\s*\(?\s*(?P<num>\d+)")
+CITATION_RANGE_SEPARATORS = {"-", "–", "إلى", "الى", "حتى"}
+CITATION_RELATIVE_RE = re.compile(r"\s*(?:(?P<count>\S+)\s+)?(?P<dir>السابق|التالي|الآتي|الاتي|اللاحق)")
+CITATION_LAW_RE = re.compile(r"\s*\)?\s*(?:من|في|ب)\s*(?P<law>(?:هذا\s+)?(?:ال)?قانون[^\n.،,:؛]{0,60})")
+CITATION_COUNT_WORDS = {
+    "الثلاث": 3, "الأربع": 4, "الاربع": 4, "الخمس": 5, "الست": 6,
+    "السبع": 7, "الثماني": 8, "الثمان": 8, "التسع": 9, "العشر": 10,
+}
+
+
+def _cited_numbers(numbers_text):
+    nums = []
+    for match in CITATION_NUMBER_RE.finditer(numbers_text):
+        num = int(match.group("num"))
+        if match.group("sep") in CITATION_RANGE_SEPARATORS and nums and nums[-1] < num:
+            nums.extend(range(nums[-1] + 1, min(num, nums[-1] + CITATION_MAX_RANGE) + 1))
+        else:
+            nums.append(num)
+    return nums
+
+
+def _relative_numbers(kind, match, own_num):
+    count = 2 if kind.startswith("مادت") else 1
+    if kind == "مواد":
+        count = CITATION_COUNT_WORDS.get(match.group("count"))
+        if count is None:
+            return []
+    elif match.group("count"):
+        return []
+    if not own_num.isdigit():
+        return []
+    own = int(own_num)
+    if match.group("dir") == "السابق":
+        return [n for n in range(own - count, own) if n > 0]
+    return list(range(own + 1, own + count + 1))
+
+
+def extract_citations(text, own_num):
+    """[(article number, law phrase)] referenced by an article, in order of appearance.
+
+    The phrase is the normalized text following "من"/"في" when it names
+    another law ("" for this law); it is matched against law names when the
+    graph is built, so references to laws outside the corpus are dropped.
+    """
+    text = CITATION_STRIP_RE.sub("", normalize_arabic_numbers(text))
+    own_num = normalize_arabic_numbers(own_num)
+    citations = {}
+    for keyword in CITATION_KEYWORD_RE.finditer(text):
+        # The "مادة (N)" heading that opens the article.
+        if keyword.start() == 0 and not keyword.group("prefix") and not keyword.group("article"):
+            continue
+        kind = keyword.group("kind").replace("ه", "ة")
+        tail = text[keyword.end():keyword.end() + CITATION_SCAN_CHARS]
+        numbers = CITATION_NUMBERS_RE.match(tail)
+        if numbers:
+            law = CITATION_LAW_RE.match(tail, numbers.end())
+            phrase = ""
+            if law and not law.group("law").startswith("هذا"):
+                phrase = normalize_arabic_text(law.group("law"))
+            nums = _cited_numbers(numbers.group(0))
+        else:
+            relative = CITATION_RELATIVE_RE.match(tail)
+            if not relative:
+                continue
+            phrase = ""
+            nums = _relative_numbers(kind, relative, own_num)
+        for num in nums:
+            citations.setdefault((str(num), phrase), None)
+    return [list(citation) for citation in citations]
+
+
+def _law_matcher(laws):
+    names = sorted(((normalize_arabic_text(law), law) for law in laws), key=lambda item: -len(item[0]))
+
+    def match(phrase):
+        for name, law in names:
+            if phrase == name or phrase.startswith(name + " "):
+                return law
+        return None
+
+    return match
+
+
+def _adjacency(edges, n):
+    bounds = array("I", [0] * (n + 1))
+    for source, _ in edges:
+        bounds[source + 1] += 1
+    for i in range(n):
+        bounds[i + 1] += bounds[i]
+    targets = array("I", [target for _, target in edges])
+    return bounds, targets
+
+
+def build_citation_graph(articles, citations):
+    """Cited-article and cited-by adjacency arrays of ``articles``.
+
+    ``citations`` holds each article's extract_citations() list. Article
+    ``i`` cites ``cites[cites_bounds[i]:cites_bounds[i + 1]]`` and is cited
+    by the same range of ``cited_by``; both are ascending article ids.
+    """
+    by_num = {}
+    laws = {}
+    for article_id, article in enumerate(articles):
+        law = article["law"]
+        laws[law] = None
+        by_num.setdefault((law, normalize_arabic_numbers(article["num"])), []).append(article_id)
+    match_law = _law_matcher(laws)
+    edges = set()
+    for article_id, (article, refs) in enumerate(zip(articles, citations)):
+        for num, phrase in refs:
+            law = match_law(phrase) if phrase else article["law"]
+            for target in by_num.get((law, num), ()):
+                if target != article_id:
+                    edges.add((article_id, target))
+    edges = sorted(edges)
+    cites_bounds, cites = _adjacency(edges, len(articles))
+    cited_by_bounds, cited_by = _adjacency(sorted((t, s) for s, t in edges), len(articles))
+    return {"cites_bounds": cites_bounds, "cites": cites, "cited_by_bounds": cited_by_bounds, "cited_by": cited_by}
+
+
+def cited_articles(corpus, article_id):
+    graph = corpus["citations"]
+    return graph["cites"][graph["cites_bounds"][article_id]:graph["cites_bounds"][article_id + 1]]
+
+
+def citing_articles(corpus, article_id):
+    graph = corpus["citations"]
+    return graph["cited_by"][graph["cited_by_bounds"][article_id]:graph["cited_by_bounds"][article_id + 1]]
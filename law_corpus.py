@@ -0,0 +1,642 @@
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import zipfile
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import repeat
+
+from lxml import etree
+
+from arabic_text import normalize_arabic_text
+from law_artifact import (
+    INDEX_ARTIFACT_FILE,
+    StringTable,
+    open_artifact,
+    pack_index,
+    pack_strings,
+    unpack_index,
+    write_artifact,
+)
+from law_citations import CITATION_SECTIONS, build_citation_graph, extract_citations
+from law_index import build_index
+from law_metrics import METRICS, timed
+
+CORPUS_DB_FILE = "laws_corpus.db"
+CORPUS_FORMAT_VERSION = 3
+CORPUS_CHECK_INTERVAL = 2.0
+UNKNOWN_ARTICLE = "غير معروفة"
+ARTICLE_HEADING_RE = re.compile(r"مادة\s*[\(]?\s*(\d+)[\)]?")
+SECTION_LEVELS = {"الكتاب": 0, "القسم": 1, "الباب": 2, "الفصل": 3, "الفرع": 4}
+SECTION_HEADING_RE = re.compile(r"^(" + "|".join(SECTION_LEVELS) + r")\s+\S")
+SECTION_TITLE_MAX_LEN = 80
+ARTICLE_FIELDS = ("law", "num", "paragraphs", "plain", "norm")
+ARTICLE_SECTIONS = ("law_ids", "text", "plain_offsets", "norm_text", "norm_offsets", "para_starts", "para_index")
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+OFFICE_DOCUMENT_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+DEFAULT_DOCUMENT_PART = "word/document.xml"
+W_BODY = W_NS + "body"
+W_P = W_NS + "p"
+W_R = W_NS + "r"
+W_HYPERLINK = W_NS + "hyperlink"
+W_T = W_NS + "t"
+W_BR = W_NS + "br"
+W_BR_TYPE = W_NS + "type"
+# Run content that python-docx's Paragraph.text renders as fixed text.
+RUN_CONTENT_TEXT = {
+    W_NS + "tab": "\t",
+    W_NS + "ptab": "\t",
+    W_NS + "cr": "\n",
+    W_NS + "noBreakHyphen": "-",
+}
+
+
+def law_name_from_file(file):
+    return file.replace(".docx", "")
+
+
+def _main_document_part(package):
+    try:
+        rels = etree.fromstring(package.read("_rels/.rels"))
+    except KeyError:
+        return DEFAULT_DOCUMENT_PART
+    for rel in rels:
+        if rel.get("Type") == OFFICE_DOCUMENT_REL:
+            return rel.get("Target", DEFAULT_DOCUMENT_PART).lstrip("/")
+    return DEFAULT_DOCUMENT_PART
+
+
+def _run_text(run):
+    for child in run:
+        if child.tag == W_T:
+            yield child.text or ""
+        elif child.tag == W_BR:
+            yield "\n" if child.get(W_BR_TYPE, "textWrapping") == "textWrapping" else ""
+        elif child.tag in RUN_CONTENT_TEXT:
+            yield RUN_CONTENT_TEXT[child.tag]
+
+
+def _paragraph_text(p):
+    parts = []
+    for child in p:
+        if child.tag == W_R:
+            parts.extend(_run_text(child))
+        elif child.tag == W_HYPERLINK:
+            for run in child.iterchildren(W_R):
+                parts.extend(_run_text(run))
+    return "".join(parts)
+
+
+def iter_docx_paragraphs(path):
+    """Yield the text of each top-level body paragraph of a .docx file.
+
+    Streams the main document part with lxml's iterparse instead of building
+    the python-docx object tree, and produces the same strings as
+    ``Document(path).paragraphs[i].text``.
+    """
+    with zipfile.ZipFile(path) as package:
+        with package.open(_main_document_part(package)) as xml_stream:
+            for _, p in etree.iterparse(xml_stream, events=("end",), tag=W_P, resolve_entities=False):
+                parent = p.getparent()
+                if parent is None or parent.tag != W_BODY:
+                    continue
+                yield _paragraph_text(p)
+                # Drop finished top-level blocks so memory stays bounded.
+                p.clear()
+                while p.getprevious() is not None:
+                    del parent[0]
+
+
+def read_docx_paragraphs(path):
+    for text in iter_docx_paragraphs(path):
+        txt = text.strip()
+        if txt:
+            yield txt
+
+
+def split_articles(paragraphs, law_name):
+    articles = []
+    last_article = UNKNOWN_ARTICLE
+    current_article_paragraphs = []
+    for txt in paragraphs:
+        match = ARTICLE_HEADING_RE.match(txt)
+        if match:
+            if current_article_paragraphs:
+                articles.append(make_article(law_name, last_article, current_article_paragraphs))
+                current_article_paragraphs = []
+            last_article = match.group(1)
+        current_article_paragraphs.append(txt)
+    if current_article_paragraphs:
+        articles.append(make_article(law_name, last_article, current_article_paragraphs))
+    return articles
+
+
+def make_article(law_name, num, paragraphs, norm=None):
+    plain = "\n".join(paragraphs)
+    return {
+        "law": law_name,
+        "num": num,
+        "paragraphs": list(paragraphs),
+        "plain": plain,
+        "norm": normalize_arabic_text(plain) if norm is None else norm,
+        "refs": extract_citations(plain, num),
+    }
+
+
+def parse_law_file(laws_dir, file):
+    paragraphs = read_docx_paragraphs(os.path.join(laws_dir, file))
+    return split_articles(paragraphs, law_name_from_file(file))
+
+
+def _parse_law_file_isolated(laws_dir, file):
+    try:
+        return parse_law_file(laws_dir, file), None
+    except Exception as e:
+        return [], str(e)
+
+
+def _pool_context():
+    # Callers are server threads; forking a multi-threaded process can copy a held lock into a worker.
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def parse_law_files(laws_dir, files, max_workers=None):
+    # Largest files first so one big law does not finish last on its own.
+    files = sorted(files, key=lambda f: os.path.getsize(os.path.join(laws_dir, f)), reverse=True)
+    workers = min(len(files), max_workers or os.cpu_count() or 1)
+    if workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as pool:
+                return dict(zip(files, pool.map(_parse_law_file_isolated, repeat(laws_dir), files)))
+        except (OSError, NotImplementedError, BrokenProcessPool):
+            pass
+    return {file: _parse_law_file_isolated(laws_dir, file) for file in files}
+
+
+def file_sha1(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def list_law_files(laws_dir):
+    return [f for f in os.listdir(laws_dir) if f.endswith(".docx")]
+
+
+def open_corpus_db(db_path):
+    conn = sqlite3.connect(db_path)
+    if conn.execute("PRAGMA user_version").fetchone()[0] != CORPUS_FORMAT_VERSION:
+        conn.executescript("""
+            DROP TABLE IF EXISTS files;
+            DROP TABLE IF EXISTS articles;
+        """)
+        conn.execute(f"PRAGMA user_version = {CORPUS_FORMAT_VERSION}")
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS files (
+            name TEXT PRIMARY KEY,
+            mtime REAL NOT NULL,
+            size INTEGER NOT NULL,
+            sha1 TEXT NOT NULL,
+            error TEXT
+        );
+        CREATE TABLE IF NOT EXISTS articles (
+            file TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            num TEXT NOT NULL,
+            paragraphs TEXT NOT NULL,
+            norm TEXT NOT NULL,
+            refs TEXT NOT NULL,
+            PRIMARY KEY (file, seq)
+        );
+    """)
+    return conn
+
+
+def _store_file(conn, file, stat, sha1, articles, error):
+    conn.execute("DELETE FROM articles WHERE file = ?", (file,))
+    conn.execute(
+        "INSERT OR REPLACE INTO files (name, mtime, size, sha1, error) VALUES (?, ?, ?, ?, ?)",
+        (file, stat.st_mtime, stat.st_size, sha1, error),
+    )
+    conn.executemany(
+        "INSERT INTO articles (file, seq, num, paragraphs, norm, refs) VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (
+                file, seq, a["num"], json.dumps(a["paragraphs"], ensure_ascii=False), a["norm"],
+                json.dumps(a["refs"], ensure_ascii=False),
+            )
+            for seq, a in enumerate(articles)
+        ],
+    )
+
+
+class Article:
+    """Read-only view of one article of an ArticleStore.
+
+    Supports the same ``article["plain"]`` lookups as the dicts built by
+    make_article(); the text is decoded from the store on each access.
+    """
+
+    __slots__ = ("_store", "id")
+
+    def __init__(self, store, article_id):
+        self._store = store
+        self.id = article_id
+
+    def __getitem__(self, key):
+        if key not in ARTICLE_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    @property
+    def law(self):
+        return self._store.laws[self._store.law_ids[self.id]]
+
+    @property
+    def num(self):
+        return self._store.nums[self.id]
+
+    @property
+    def plain(self):
+        offsets = self._store.plain_offsets
+        return str(self._store.text[offsets[self.id]:offsets[self.id + 1]], "utf-8")
+
+    @property
+    def norm(self):
+        offsets = self._store.norm_offsets
+        return str(self._store.norm_text[offsets[self.id]:offsets[self.id + 1]], "utf-8")
+
+    @property
+    def paragraphs(self):
+        store = self._store
+        first, last = store.para_index[self.id], store.para_index[self.id + 1]
+        end = store.plain_offsets[self.id + 1]
+        # Paragraphs are joined with one "\n" byte, so each ends one byte before the next starts.
+        bounds = [store.para_starts[k] for k in range(first, last)] + [end + 1]
+        return [str(store.text[a:b - 1], "utf-8") for a, b in zip(bounds, bounds[1:])]
+
+    def __repr__(self):
+        return f"Article({self.law!r}, {self.num!r})"
+
+
+class ArticleStore:
+    """All articles of a corpus packed into two UTF-8 buffers with array offsets.
+
+    Article ``i`` spans ``text[plain_offsets[i]:plain_offsets[i + 1]]`` (its
+    paragraphs joined with newlines) and the same range of ``norm_offsets``
+    in ``norm_text``; ``para_starts[para_index[i]:para_index[i + 1]]`` are its
+    paragraph offsets. Law names and article numbers are interned, so each
+    distinct string is held once. Indexing returns Article views.
+
+    The buffers and offsets are bytes and arrays when built in memory, or
+    memoryviews of a mapped index artifact (see open_index_artifact()).
+    """
+
+    __slots__ = ("laws", "law_ids", "nums", "text", "plain_offsets", "norm_text", "norm_offsets",
+                 "para_starts", "para_index")
+
+    def __init__(self, laws, law_ids, nums, text, plain_offsets, norm_text, norm_offsets, para_starts, para_index):
+        self.laws = laws
+        self.law_ids = law_ids
+        self.nums = nums
+        self.text = text
+        self.plain_offsets = plain_offsets
+        self.norm_text = norm_text
+        self.norm_offsets = norm_offsets
+        self.para_starts = para_starts
+        self.para_index = para_index
+
+    def __len__(self):
+        return len(self.nums)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [Article(self, i) for i in range(*key.indices(len(self)))]
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("article index out of range")
+        return Article(self, key)
+
+    def __iter__(self):
+        return (Article(self, i) for i in range(len(self)))
+
+
+def build_article_store(rows):
+    """Pack (law, num, paragraphs, norm) rows into an ArticleStore."""
+    laws, law_id_of = [], {}
+    law_ids, nums = array("H"), []
+    text, norm_text = bytearray(), bytearray()
+    plain_offsets, norm_offsets = array("I", [0]), array("I", [0])
+    para_starts, para_index = array("I"), array("I", [0])
+    for law, num, paragraphs, norm in rows:
+        if law not in law_id_of:
+            law_id_of[law] = len(laws)
+            laws.append(sys.intern(law))
+        law_ids.append(law_id_of[law])
+        nums.append(sys.intern(num))
+        for k, paragraph in enumerate(paragraphs):
+            if k:
+                text += b"\n"
+            para_starts.append(len(text))
+            text += paragraph.encode("utf-8")
+        para_index.append(len(para_starts))
+        plain_offsets.append(len(text))
+        norm_text += norm.encode("utf-8")
+        norm_offsets.append(len(norm_text))
+    return ArticleStore(
+        laws, law_ids, nums, bytes(text), plain_offsets, bytes(norm_text), norm_offsets, para_starts, para_index
+    )
+
+
+def _iter_file_rows(conn, file):
+    law_name = law_name_from_file(file)
+    rows = conn.execute(
+        "SELECT num, paragraphs, norm FROM articles WHERE file = ? ORDER BY seq", (file,)
+    )
+    for num, paragraphs, norm in rows:
+        yield law_name, num, json.loads(paragraphs), norm
+
+
+def sync_corpus_db(conn, laws_dir, files, max_workers=None):
+    known = {
+        name: (mtime, size, sha1)
+        for name, mtime, size, sha1 in conn.execute("SELECT name, mtime, size, sha1 FROM files")
+    }
+    touched = {}
+    changed = {}
+    for file in files:
+        path = os.path.join(laws_dir, file)
+        stat = os.stat(path)
+        stored = known.get(file)
+        if stored and stored[0] == stat.st_mtime and stored[1] == stat.st_size:
+            continue
+        sha1 = file_sha1(path)
+        if stored and stored[2] == sha1:
+            touched[file] = stat
+        else:
+            changed[file] = (stat, sha1)
+    parsed = {}
+    if changed:
+        # DOCX extraction, article splitting and normalization, in the worker processes.
+        with timed("docx_parse"):
+            parsed = parse_law_files(laws_dir, list(changed), max_workers)
+    with conn:
+        for name in set(known) - set(files):
+            conn.execute("DELETE FROM files WHERE name = ?", (name,))
+            conn.execute("DELETE FROM articles WHERE file = ?", (name,))
+        for file, stat in touched.items():
+            conn.execute(
+                "UPDATE files SET mtime = ?, size = ? WHERE name = ?",
+                (stat.st_mtime, stat.st_size, file),
+            )
+        for file, (stat, sha1) in changed.items():
+            articles, error = parsed[file]
+            _store_file(conn, file, stat, sha1, articles, error)
+
+
+def load_corpus(laws_dir, db_path=CORPUS_DB_FILE, max_workers=None):
+    with timed("corpus_load"):
+        return _load_corpus(laws_dir, db_path, max_workers)
+
+
+def _load_corpus(laws_dir, db_path, max_workers):
+    files = list_law_files(laws_dir)
+    conn = open_corpus_db(db_path)
+    try:
+        sync_corpus_db(conn, laws_dir, files, max_workers)
+        meta = {
+            name: (sha1, error)
+            for name, sha1, error in conn.execute("SELECT name, sha1, error FROM files")
+        }
+        counts = dict(conn.execute("SELECT file, count(*) FROM articles GROUP BY file"))
+        law_ranges = {}
+        errors = {}
+        start = 0
+        for file in files:
+            sha1, error = meta[file]
+            if error is not None:
+                errors[file] = error
+            law_ranges[file] = (start, start + counts.get(file, 0))
+            start += counts.get(file, 0)
+        articles = build_article_store(row for file in files for row in _iter_file_rows(conn, file))
+        refs = [
+            json.loads(row[0])
+            for file in files
+            for row in conn.execute("SELECT refs FROM articles WHERE file = ? ORDER BY seq", (file,))
+        ]
+    finally:
+        conn.close()
+    version = hashlib.sha1(
+        "\n".join(f"{f}:{meta[f][0]}" for f in sorted(files)).encode("utf-8")
+    ).hexdigest()
+    return {
+        "version": version,
+        "files": files,
+        "articles": articles,
+        "law_ranges": law_ranges,
+        "errors": errors,
+        "citations": build_citation_graph(articles, refs),
+    }
+
+
+def law_outline(articles):
+    """Table of contents of one law: (level, title, first article position).
+
+    Section headings ("الباب الأول", "الفصل الثاني", ...) are stored as the
+    trailing paragraphs of the article before them, so a heading found after
+    an article's first paragraph opens the section at the next article.
+    """
+    outline = []
+    for pos, article in enumerate(articles):
+        paragraphs = article["paragraphs"]
+        for i, txt in enumerate(paragraphs):
+            match = SECTION_HEADING_RE.match(txt)
+            if not match or len(txt) > SECTION_TITLE_MAX_LEN:
+                continue
+            title = txt
+            following = paragraphs[i + 1] if i + 1 < len(paragraphs) else ""
+            if following and len(following) <= SECTION_TITLE_MAX_LEN and not SECTION_HEADING_RE.match(following):
+                title = f"{txt} - {following}"
+            start = pos + 1 if i > 0 and pos + 1 < len(articles) else pos
+            outline.append((SECTION_LEVELS[match.group(1)], title, start))
+    return outline
+
+
+def law_articles(corpus, file):
+    start, end = corpus["law_ranges"].get(file, (0, 0))
+    return corpus["articles"][start:end]
+
+
+def laws_dir_signature(laws_dir):
+    return tuple(sorted(
+        (entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+        for entry in os.scandir(laws_dir)
+        if entry.name.endswith(".docx")
+    ))
+
+
+def _artifact_sources(laws_dir, files):
+    sources = {}
+    for file in files:
+        path = os.path.join(laws_dir, file)
+        stat = os.stat(path)
+        sources[file] = [stat.st_size, stat.st_mtime_ns, file_sha1(path)]
+    return sources
+
+
+def _sources_match(laws_dir, sources):
+    files = list_law_files(laws_dir)
+    if set(files) != set(sources):
+        return False
+    for file in files:
+        size, mtime_ns, sha1 = sources[file]
+        path = os.path.join(laws_dir, file)
+        stat = os.stat(path)
+        if stat.st_size != size or (stat.st_mtime_ns != mtime_ns and file_sha1(path) != sha1):
+            return False
+    return True
+
+
+def build_index_artifact(laws_dir, path=INDEX_ARTIFACT_FILE, db_path=CORPUS_DB_FILE, max_workers=None):
+    """Compile ``laws_dir`` into the single index file read by open_index_artifact()."""
+    sources = _artifact_sources(laws_dir, list_law_files(laws_dir))
+    corpus = load_corpus(laws_dir, db_path, max_workers)
+    store = corpus["articles"]
+    sections, index_meta = pack_index(build_index(store))
+    sections.update({name: getattr(store, name) for name in ARTICLE_SECTIONS})
+    sections["nums"], sections["num_offsets"] = pack_strings(store.nums)
+    sections.update(corpus["citations"])
+    meta = {
+        "version": corpus["version"],
+        "files": corpus["files"],
+        "law_ranges": corpus["law_ranges"],
+        "errors": corpus["errors"],
+        "laws": store.laws,
+        "sources": sources,
+        "index": index_meta,
+    }
+    write_artifact(path, meta, sections)
+    return corpus
+
+
+def open_index_artifact(path, laws_dir):
+    """Corpus dict (with its "index") served in place from the artifact at ``path``.
+
+    Returns None when there is no readable artifact or the law files in
+    ``laws_dir`` are not the ones it was built from.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        meta, sections = open_artifact(path)
+    except ValueError:
+        return None
+    if not _sources_match(laws_dir, meta["sources"]):
+        return None
+    articles = ArticleStore(
+        [sys.intern(law) for law in meta["laws"]],
+        sections["law_ids"],
+        StringTable(sections["nums"], sections["num_offsets"]),
+        sections["text"],
+        sections["plain_offsets"],
+        sections["norm_text"],
+        sections["norm_offsets"],
+        sections["para_starts"],
+        sections["para_index"],
+    )
+    return {
+        "version": meta["version"],
+        "files": meta["files"],
+        "articles": articles,
+        "law_ranges": {file: tuple(span) for file, span in meta["law_ranges"].items()},
+        "errors": meta["errors"],
+        "citations": {name: sections[name] for name in CITATION_SECTIONS},
+        "index": unpack_index(sections, meta["index"]),
+    }
+
+
+class CorpusStore:
+    """Process-wide, read-only corpus and search index.
+
+    snapshot() returns the current corpus dict (with its "index"). When a
+    law file is added, removed or modified the corpus is rebuilt and swapped
+    in as a whole; readers holding the previous snapshot keep using it.
+    While the index artifact at ``artifact_path`` matches the law files it
+    is mapped instead of parsing and indexing them.
+    """
+
+    def __init__(self, laws_dir, db_path=CORPUS_DB_FILE, check_interval=CORPUS_CHECK_INTERVAL,
+                 artifact_path=INDEX_ARTIFACT_FILE):
+        self.laws_dir = laws_dir
+        self.db_path = db_path
+        self.check_interval = check_interval
+        self.artifact_path = artifact_path
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._signature = None
+        self._checked_at = 0.0
+
+    def _rebuild(self, signature):
+        corpus = None
+        if self.artifact_path:
+            with timed("artifact_open"):
+                corpus = open_index_artifact(self.artifact_path, self.laws_dir)
+        if corpus is None:
+            corpus = load_corpus(self.laws_dir, self.db_path)
+            with timed("index_build"):
+                corpus["index"] = build_index(corpus["articles"])
+        METRICS.set_gauge("corpus_articles", len(corpus["articles"]))
+        METRICS.set_gauge("corpus_files", len(corpus["files"]))
+        METRICS.set_gauge("corpus_file_errors", len(corpus["errors"]))
+        self._snapshot = corpus
+        self._signature = signature
+
+    def snapshot(self):
+        current = self._snapshot
+        now = time.monotonic()
+        if current is not None and now - self._checked_at < self.check_interval:
+            return current
+        self._checked_at = now
+        signature = laws_dir_signature(self.laws_dir)
+        if current is not None and signature == self._signature:
+            return current
+        if current is not None and not self._lock.acquire(blocking=False):
+            return current
+        if current is None:
+            self._lock.acquire()
+        try:
+            if self._snapshot is None or self._signature != signature:
+                self._rebuild(signature)
+            return self._snapshot
+        finally:
+            self._lock.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the laws directory into a memory-mapped index file.")
+    parser.add_argument("command", choices=["build-index"])
+    parser.add_argument("--laws-dir", default="laws")
+    parser.add_argument("-o", "--output", default=INDEX_ARTIFACT_FILE)
+    parser.add_argument("--db", default=CORPUS_DB_FILE)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    corpus = build_index_artifact(args.laws_dir, args.output, args.db)
+    print(f"{len(corpus['articles'])} articles from {len(corpus['files'])} files written to {args.output} "
+          f"({os.path.getsize(args.output) / 1e6:.1f} MB in {time.perf_counter() - start:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
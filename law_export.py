@@ -0,0 +1,251 @@
+import csv
+import hashlib
+import io
+import re
+import threading
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+from law_metrics import METRICS, timed
+
+EXPORT_CACHE_SIZE = 16
+EXPORT_WORKERS = 2
+EXPORT_TITLE = "نتائج البحث في القوانين اليمنية"
+EXPORT_EMPTY_TEXT = "لم يتم العثور على نتائج للكلمات المفتاحية المحددة."
+BATCH_EXPORT_TITLE = "مصفوفة نتائج البحث المتعدد"
+BATCH_EXPORT_EMPTY_TEXT = "لا توجد نتائج لهذا المصطلح."
+BATCH_CSV_HEADER = ("المصطلح", "القانون", "المادة", "عدد المرات")
+BATCH_SUMMARY_HEADER = ("المصطلح", "عدد المواد", "عدد المرات")
+CSV_MIME = "text/csv"
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+_INVALID_XML_CHARS_RE = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+CONTENT_TYPES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '<Override PartName="/word/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.styles+xml"/>'
+    '</Types>'
+)
+
+PACKAGE_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+
+DOCUMENT_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+STYLES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<w:styles xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+    '<w:docDefaults><w:rPrDefault><w:rPr>'
+    '<w:rFonts w:ascii="Arial" w:hAnsi="Arial" w:cs="Arial"/><w:sz w:val="24"/><w:szCs w:val="24"/>'
+    '</w:rPr></w:rPrDefault></w:docDefaults>'
+    '<w:style w:type="paragraph" w:default="1" w:styleId="Normal"><w:name w:val="Normal"/>'
+    '<w:pPr><w:bidi/><w:spacing w:after="160"/></w:pPr></w:style>'
+    '<w:style w:type="paragraph" w:styleId="Heading1"><w:name w:val="heading 1"/>'
+    '<w:basedOn w:val="Normal"/><w:next w:val="Normal"/><w:qFormat/>'
+    '<w:pPr><w:keepNext/><w:spacing w:before="480" w:after="240"/><w:outlineLvl w:val="0"/></w:pPr>'
+    '<w:rPr><w:b/><w:bCs/><w:color w:val="2E74B5"/><w:sz w:val="32"/><w:szCs w:val="32"/></w:rPr></w:style>'
+    '<w:style w:type="paragraph" w:styleId="Heading2"><w:name w:val="heading 2"/>'
+    '<w:basedOn w:val="Normal"/><w:next w:val="Normal"/><w:qFormat/>'
+    '<w:pPr><w:keepNext/><w:spacing w:before="200" w:after="120"/><w:outlineLvl w:val="1"/></w:pPr>'
+    '<w:rPr><w:b/><w:bCs/><w:color w:val="2E74B5"/><w:sz w:val="28"/><w:szCs w:val="28"/></w:rPr></w:style>'
+    '</w:styles>'
+)
+
+DOCUMENT_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+)
+DOCUMENT_TAIL = (
+    '<w:sectPr><w:pgSz w:w="11906" w:h="16838"/>'
+    '<w:pgMar w:top="1440" w:right="1440" w:bottom="1440" w:left="1440" w:header="708" w:footer="708" w:gutter="0"/>'
+    '<w:bidi/></w:sectPr></w:body></w:document>'
+)
+PAGE_BREAK_XML = '<w:p><w:r><w:br w:type="page"/></w:r></w:p>'
+
+
+def _xml_text(text):
+    return escape(_INVALID_XML_CHARS_RE.sub("", text))
+
+
+def paragraph_xml(text, style=None):
+    ppr = f'<w:pPr><w:pStyle w:val="{style}"/><w:bidi/></w:pPr>' if style else '<w:pPr><w:bidi/></w:pPr>'
+    lines = '<w:br/>'.join(
+        f'<w:t xml:space="preserve">{_xml_text(line)}</w:t>' for line in text.split("\n")
+    )
+    return f'<w:p>{ppr}<w:r><w:rPr><w:rtl/></w:rPr>{lines}</w:r></w:p>'
+
+
+def table_xml(rows):
+    """A bordered right-to-left table; the first row is the bold header."""
+    cols = len(rows[0])
+    border = '<w:{side} w:val="single" w:sz="4" w:space="0" w:color="999999"/>'
+    borders = "".join(border.format(side=side) for side in ("top", "left", "bottom", "right", "insideH", "insideV"))
+    parts = [
+        f'<w:tbl><w:tblPr><w:bidiVisual/><w:tblW w:w="5000" w:type="pct"/><w:tblBorders>{borders}</w:tblBorders></w:tblPr>',
+        '<w:tblGrid>' + f'<w:gridCol w:w="{9026 // cols}"/>' * cols + '</w:tblGrid>',
+    ]
+    for r, row in enumerate(rows):
+        bold = '<w:b/><w:bCs/>' if r == 0 else ''
+        parts.append('<w:tr>')
+        for cell in row:
+            parts.append(
+                f'<w:tc><w:p><w:pPr><w:bidi/><w:spacing w:after="0"/></w:pPr>'
+                f'<w:r><w:rPr>{bold}<w:rtl/></w:rPr><w:t xml:space="preserve">{_xml_text(str(cell))}</w:t></w:r></w:p></w:tc>'
+            )
+        parts.append('</w:tr>')
+    parts.append('</w:tbl>')
+    return "".join(parts)
+
+
+def write_results_docx(articles, out):
+    """Write articles as a .docx package to the binary stream ``out``.
+
+    WordprocessingML is streamed into the zip one article at a time, so
+    large exports never hold a python-docx object model in memory.
+    """
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as package:
+        package.writestr("[Content_Types].xml", CONTENT_TYPES_XML)
+        package.writestr("_rels/.rels", PACKAGE_RELS_XML)
+        package.writestr("word/_rels/document.xml.rels", DOCUMENT_RELS_XML)
+        package.writestr("word/styles.xml", STYLES_XML)
+        with package.open("word/document.xml", "w") as document:
+            document.write(DOCUMENT_HEAD.encode("utf-8"))
+            document.write(paragraph_xml(EXPORT_TITLE, "Heading1").encode("utf-8"))
+            if not articles:
+                document.write(paragraph_xml(EXPORT_EMPTY_TEXT).encode("utf-8"))
+            for i, article in enumerate(articles):
+                if i:
+                    document.write(PAGE_BREAK_XML.encode("utf-8"))
+                heading = f"القانون: {article['law']} - المادة: {article['num']}"
+                document.write(paragraph_xml(heading, "Heading2").encode("utf-8"))
+                document.write(paragraph_xml(article["plain"]).encode("utf-8"))
+            document.write(DOCUMENT_TAIL.encode("utf-8"))
+
+
+def export_results_to_word(articles):
+    buffer = BytesIO()
+    with timed("word_export"):
+        write_results_docx(articles, buffer)
+    return buffer.getvalue()
+
+
+def _batch_by_term(terms, rows):
+    by_term = {term: {} for term in terms}
+    for term, law, num, count in rows:
+        by_term[term].setdefault(law, []).append((num, count))
+    return by_term
+
+
+def write_batch_docx(terms, rows, out):
+    """Write the batch hit matrix (law_search.batch_matrix_rows) as a .docx package.
+
+    A summary table of all terms is followed by each term's matching
+    articles, grouped by law.
+    """
+    by_term = _batch_by_term(terms, rows)
+    summary = [BATCH_SUMMARY_HEADER]
+    for term, laws in by_term.items():
+        hits = [count for found in laws.values() for _, count in found]
+        summary.append((term, len(hits), sum(hits)))
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as package:
+        package.writestr("[Content_Types].xml", CONTENT_TYPES_XML)
+        package.writestr("_rels/.rels", PACKAGE_RELS_XML)
+        package.writestr("word/_rels/document.xml.rels", DOCUMENT_RELS_XML)
+        package.writestr("word/styles.xml", STYLES_XML)
+        with package.open("word/document.xml", "w") as document:
+            document.write(DOCUMENT_HEAD.encode("utf-8"))
+            document.write(paragraph_xml(BATCH_EXPORT_TITLE, "Heading1").encode("utf-8"))
+            document.write(table_xml(summary).encode("utf-8"))
+            for term, laws in by_term.items():
+                document.write(paragraph_xml(term, "Heading2").encode("utf-8"))
+                if not laws:
+                    document.write(paragraph_xml(BATCH_EXPORT_EMPTY_TEXT).encode("utf-8"))
+                for law, found in laws.items():
+                    nums = "، ".join(f"{num} ({count})" for num, count in found)
+                    document.write(paragraph_xml(f"{law}: المواد {nums}").encode("utf-8"))
+            document.write(DOCUMENT_TAIL.encode("utf-8"))
+
+
+def export_batch_to_word(terms, rows):
+    buffer = BytesIO()
+    with timed("batch_export"):
+        write_batch_docx(terms, rows, buffer)
+    return buffer.getvalue()
+
+
+def export_batch_to_csv(rows):
+    """CSV bytes of the hit matrix, with a BOM so Excel reads the Arabic as UTF-8."""
+    text = io.StringIO()
+    writer = csv.writer(text)
+    writer.writerow(BATCH_CSV_HEADER)
+    writer.writerows(rows)
+    return text.getvalue().encode("utf-8-sig")
+
+
+def export_key(corpus_version, article_ids):
+    digest = hashlib.sha1(corpus_version.encode("utf-8"))
+    digest.update(",".join(map(str, article_ids)).encode("ascii"))
+    return digest.hexdigest()
+
+
+def batch_export_key(corpus_version, terms, options, kind):
+    """Key of a batch matrix export: the terms, the search options and the file kind."""
+    digest = hashlib.sha1(corpus_version.encode("utf-8"))
+    digest.update(repr((tuple(terms), tuple(options), kind)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ExportJobs:
+    """Background exports, cached by key with LRU eviction."""
+
+    def __init__(self, max_entries=EXPORT_CACHE_SIZE, workers=EXPORT_WORKERS):
+        self.max_entries = max_entries
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="word-export")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None:
+                self._jobs.move_to_end(key)
+            METRICS.incr("export_cache_lookups_total", result="miss" if job is None else "hit")
+            return job
+
+    def submit(self, key, articles):
+        """Word export of a result set's articles."""
+        return self.submit_export(key, export_results_to_word, list(articles))
+
+    def submit_export(self, key, export, *args):
+        """Run ``export(*args)`` (returning the file bytes) unless ``key`` is already cached."""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None or (job.done() and job.exception() is not None):
+                job = self._executor.submit(export, *args)
+                self._jobs[key] = job
+            self._jobs.move_to_end(key)
+            while len(self._jobs) > self.max_entries:
+                self._jobs.popitem(last=False)
+            return job
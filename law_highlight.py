@@ -0,0 +1,75 @@
+import re
+from functools import lru_cache
+
+from arabic_text import TASHKEEL_RANGE, normalize_arabic_text_with_offsets
+
+HIGHLIGHT_CACHE_SIZE = 4096
+MARK_OPEN = {
+    "exact": "<mark>",
+    "partial": "<mark class=\"mark-soft\">",
+}
+MARK_CLOSE = "</mark>"
+
+
+@lru_cache(maxsize=256)
+def _keyword_pattern(normalized_keywords, exact_match):
+    alternation = "|".join(
+        re.escape(kw) for kw in sorted(set(normalized_keywords), key=len, reverse=True) if kw
+    )
+    if not alternation:
+        return None
+    if exact_match:
+        return re.compile(r"(?<!\w)(?:" + alternation + r")(?!\w)")
+    return re.compile(alternation)
+
+
+def _is_tashkeel(ch):
+    return TASHKEEL_RANGE[0] <= ord(ch) <= TASHKEEL_RANGE[1]
+
+
+def find_keyword_spans(text, normalized_keywords, exact_match=False):
+    pattern = _keyword_pattern(tuple(normalized_keywords), exact_match)
+    if pattern is None:
+        return []
+    norm, offsets, ends = normalize_arabic_text_with_offsets(text)
+    spans = []
+    for m in pattern.finditer(norm):
+        s, e = m.start(), m.end()
+        whole_word = (s == 0 or norm[s - 1] == " ") and (e == len(norm) or norm[e] == " ")
+        start = offsets[s]
+        end = ends[e - 1]
+        while end < len(text) and _is_tashkeel(text[end]):
+            end += 1
+        spans.append((start, end, "exact" if whole_word else "partial"))
+    return merge_spans(spans)
+
+
+def merge_spans(spans):
+    merged = []
+    for s, e, kind in sorted(spans):
+        if merged and s < merged[-1][1]:
+            last_s, last_e, last_kind = merged[-1]
+            kind = "exact" if "exact" in (kind, last_kind) else last_kind
+            merged[-1] = (last_s, max(last_e, e), kind)
+        else:
+            merged.append((s, e, kind))
+    return merged
+
+
+def highlight_keywords(text, normalized_keywords, exact_match=False):
+    spans = find_keyword_spans(text, normalized_keywords, exact_match)
+    if not spans:
+        return text
+    result = []
+    last_idx = 0
+    for s, e, kind in spans:
+        result.append(text[last_idx:s])
+        result.append(MARK_OPEN[kind] + text[s:e] + MARK_CLOSE)
+        last_idx = e
+    result.append(text[last_idx:])
+    return "".join(result)
+
+
+@lru_cache(maxsize=HIGHLIGHT_CACHE_SIZE)
+def cached_highlight(text, normalized_keywords, exact_match=False):
+    return highlight_keywords(text, normalized_keywords, exact_match)
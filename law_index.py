@@ -0,0 +1,360 @@
+import bisect
+import heapq
+import math
+import re
+from collections import defaultdict
+
+from arabic_text import arabic_stems, normalize_arabic_numbers
+
+VOCAB_GRAM_SIZE = 3
+MAX_ARTICLE_RANGE = 2000
+ARTICLE_RANGE_RE = re.compile(r"^(\d+)\s*(?:-|–|—|إلى|الى)\s*(\d+)$")
+ARTICLE_LIST_SPLIT_RE = re.compile(r"[,،\s]+")
+BM25_K1 = 1.2
+BM25_B = 0.75
+MATCH_STEM = "stem"
+MATCH_FUZZY = "fuzzy"
+FUZZY_MIN_LENGTH = 3
+PREFIX_END = chr(0x10FFFF)
+# Proclitics and the definite article, so typing "ايجار" also finds "الايجار" and "وللايجار".
+PREFIX_CLITICS = ("", "و", "ف", "ب", "ل", "ك", "ال", "وال", "فال", "بال", "كال", "لل", "ولل", "فلل")
+
+
+def tokenize(norm_text):
+    return norm_text.split(" ") if norm_text else []
+
+
+def _grams(token, n=VOCAB_GRAM_SIZE):
+    return {token[i:i + n] for i in range(len(token) - n + 1)}
+
+
+def _deletes(word):
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def edit_distance_at_most_one(a, b):
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return a[i + 1:] == b[i + 1:]
+    return a[i:] == b[i + 1:]
+
+
+def build_stem_index(vocab):
+    """{stem: tokens} plus a one-deletion neighbourhood of the tokens for fuzzy lookups."""
+    stems = defaultdict(list)
+    vocab_deletes = defaultdict(list)
+    for token in vocab:
+        for stem in arabic_stems(token):
+            stems[stem].append(token)
+        if len(token) >= FUZZY_MIN_LENGTH:
+            for variant in _deletes(token):
+                vocab_deletes[variant].append(token)
+    return dict(stems), dict(vocab_deletes)
+
+
+def build_index(articles):
+    postings = defaultdict(dict)
+    articles_by_num = defaultdict(list)
+    lengths = []
+    for article_id, article in enumerate(articles):
+        articles_by_num[(article["law"], normalize_arabic_numbers(article["num"]))].append(article_id)
+        tokens = tokenize(article["norm"])
+        lengths.append(len(tokens))
+        for pos, token in enumerate(tokens):
+            postings[token].setdefault(article_id, []).append(pos)
+    vocab_grams = defaultdict(set)
+    for token in postings:
+        for gram in _grams(token):
+            vocab_grams[gram].add(token)
+    stems, vocab_deletes = build_stem_index(postings)
+    return {
+        "postings": dict(postings),
+        "vocab": sorted(postings),
+        "vocab_grams": dict(vocab_grams),
+        "stems": stems,
+        "vocab_deletes": vocab_deletes,
+        "articles_by_num": dict(articles_by_num),
+        "size": len(articles),
+        "lengths": lengths,
+        "avg_length": sum(lengths) / len(lengths) if lengths else 0.0,
+    }
+
+
+def _tokens_containing(index, fragment):
+    if len(fragment) < VOCAB_GRAM_SIZE:
+        return [t for t in index["postings"] if fragment in t]
+    candidates = None
+    for gram in sorted(_grams(fragment), key=lambda g: len(index["vocab_grams"].get(g, ()))):
+        tokens = index["vocab_grams"].get(gram)
+        if not tokens:
+            return []
+        candidates = set(tokens) if candidates is None else candidates.intersection(tokens)
+        if not candidates:
+            return []
+    return [t for t in candidates if fragment in t]
+
+
+def _slot_positions(index, tokens):
+    merged = {}
+    for token in tokens:
+        for article_id, positions in index["postings"].get(token, {}).items():
+            merged.setdefault(article_id, set()).update(positions)
+    return merged
+
+
+def _match_slots(slots):
+    if not slots or any(not slot for slot in slots):
+        return set()
+    ordered = sorted(range(len(slots)), key=lambda i: len(slots[i]))
+    article_ids = set(slots[ordered[0]])
+    for i in ordered[1:]:
+        article_ids &= slots[i].keys()
+        if not article_ids:
+            return set()
+    if len(slots) == 1:
+        return article_ids
+    matches = set()
+    for article_id in article_ids:
+        first = slots[0][article_id]
+        rest = [slots[i][article_id] for i in range(1, len(slots))]
+        for p in first:
+            if all(p + i + 1 in positions for i, positions in enumerate(rest)):
+                matches.add(article_id)
+                break
+    return matches
+
+
+def fuzzy_tokens(index, word):
+    """Indexed tokens within one edit (insert, delete or substitute) of ``word``."""
+    if len(word) < FUZZY_MIN_LENGTH:
+        return []
+    postings = index["postings"]
+    candidates = {word} if word in postings else set()
+    candidates.update(index["vocab_deletes"].get(word, ()))
+    for variant in _deletes(word):
+        if variant in postings:
+            candidates.add(variant)
+        candidates.update(index["vocab_deletes"].get(variant, ()))
+    return sorted(t for t in candidates if edit_distance_at_most_one(word, t))
+
+
+def word_variants(index, word, morphology, exact_match=False):
+    """Indexed tokens that match ``word`` by stem, plus those it matches as written.
+
+    Fuzzy mode adds the stems of the indexed words one edit away, even when
+    the word's own stems occur: a typo often stems to an unrelated word.
+    """
+    stems = dict.fromkeys(stem for stem in arabic_stems(word) if stem in index["stems"])
+    if morphology == MATCH_FUZZY:
+        stems.update(dict.fromkeys(stem for t in fuzzy_tokens(index, word) for stem in arabic_stems(t)))
+    variants = dict.fromkeys(token for s in stems for token in index["stems"].get(s, ()))
+    # Stem matching only ever widens the search.
+    if exact_match:
+        if word in index["postings"]:
+            variants[word] = None
+    else:
+        variants.update(dict.fromkeys(_tokens_containing(index, word)))
+    return list(variants)
+
+
+def _slot_specs(norm_kw, exact_match, morphology):
+    """(kind, word) of each token slot of a keyword."""
+    parts = tokenize(norm_kw)
+    if morphology:
+        return [("variants", p) for p in parts]
+    if exact_match:
+        return [("exact", p) for p in parts]
+    if len(parts) <= 1:
+        return [("contains", p) for p in parts]
+    # A substring phrase: the first word may be a token's tail and the last word its head.
+    return [("suffix", parts[0])] + [("exact", p) for p in parts[1:-1]] + [("prefix", parts[-1])]
+
+
+def _slot_tokens(index, kind, word, morphology, exact_match):
+    if kind == "variants":
+        return word_variants(index, word, morphology, exact_match)
+    if kind == "exact":
+        return [word]
+    tokens = _tokens_containing(index, word)
+    if kind == "suffix":
+        return [t for t in tokens if t.endswith(word)]
+    if kind == "prefix":
+        return [t for t in tokens if t.startswith(word)]
+    return tokens
+
+
+def _keyword_slots(index, norm_kw, exact_match, morphology=None, cache=None):
+    """Per-slot {article_id: positions}; ``cache`` shares slots between keywords."""
+    slots = []
+    for spec in _slot_specs(norm_kw, exact_match, morphology):
+        slot = cache.get(spec) if cache is not None else None
+        if slot is None:
+            slot = _slot_positions(index, _slot_tokens(index, *spec, morphology, exact_match))
+            if cache is not None:
+                cache[spec] = slot
+        slots.append(slot)
+    return slots
+
+
+def find_exact(index, norm_kw):
+    return _match_slots(_keyword_slots(index, norm_kw, True))
+
+
+def find_substring(index, norm_kw):
+    return _match_slots(_keyword_slots(index, norm_kw, False))
+
+
+def keyword_occurrences(index, norm_kw, exact_match=False, morphology=None, cache=None):
+    """{article_id: sorted start positions} of every occurrence of the keyword."""
+    slots = _keyword_slots(index, norm_kw, exact_match, morphology, cache)
+    occurrences = {}
+    for article_id in _match_slots(slots):
+        rest = [slots[i][article_id] for i in range(1, len(slots))]
+        occurrences[article_id] = sorted(
+            p for p in slots[0][article_id]
+            if all(p + i + 1 in positions for i, positions in enumerate(rest))
+        )
+    return occurrences
+
+
+def batch_keyword_occurrences(index, normalized_keywords, exact_match=False, morphology=None):
+    """keyword_occurrences() of many keywords at once.
+
+    Each distinct word is resolved against the vocabulary and its postings
+    merged once, however many keywords contain it.
+    """
+    cache = {}
+    return {
+        kw: keyword_occurrences(index, kw, exact_match, morphology, cache)
+        for kw in dict.fromkeys(normalized_keywords)
+        if kw
+    }
+
+
+def keyword_frequencies(index, norm_kw, exact_match=False, morphology=None):
+    occurrences = keyword_occurrences(index, norm_kw, exact_match, morphology)
+    return {article_id: len(starts) for article_id, starts in occurrences.items()}
+
+
+def bm25_scores(index, normalized_keywords, exact_match=False, morphology=None):
+    scores = defaultdict(float)
+    n = index["size"]
+    avg_length = index["avg_length"] or 1.0
+    lengths = index["lengths"]
+    for kw in dict.fromkeys(normalized_keywords):
+        if not kw:
+            continue
+        frequencies = keyword_frequencies(index, kw, exact_match, morphology)
+        df = len(frequencies)
+        idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+        for article_id, tf in frequencies.items():
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[article_id] / avg_length)
+            scores[article_id] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+    return scores
+
+
+def rank_articles(index, normalized_keywords, exact_match=False, candidates=None, limit=None, morphology=None):
+    scores = bm25_scores(index, normalized_keywords, exact_match, morphology)
+    items = scores.items() if candidates is None else ((i, scores[i]) for i in candidates if i in scores)
+    # Ties keep document order.
+    key = lambda item: (item[1], -item[0])
+    ranked = heapq.nlargest(limit, items, key=key) if limit else sorted(items, key=key, reverse=True)
+    return [article_id for article_id, _ in ranked]
+
+
+def find_keywords(index, normalized_keywords, exact_match=False, morphology=None):
+    matches = set()
+    for kw in normalized_keywords:
+        if not kw:
+            continue
+        if morphology:
+            matches |= _match_slots(_keyword_slots(index, kw, exact_match, morphology))
+        else:
+            matches |= find_exact(index, kw) if exact_match else find_substring(index, kw)
+    return matches
+
+
+def prefix_range(index, prefix, lo=0, hi=None):
+    """Slice of the sorted vocabulary holding the tokens that start with ``prefix``.
+
+    Passing the range of a shorter prefix narrows the search to it.
+    """
+    vocab = index["vocab"]
+    hi = len(vocab) if hi is None else hi
+    return bisect.bisect_left(vocab, prefix, lo, hi), bisect.bisect_left(vocab, prefix + PREFIX_END, lo, hi)
+
+
+def _prefix_spans(index, token, old_spans=None):
+    if old_spans is None:
+        return [prefix_range(index, clitic + token) for clitic in PREFIX_CLITICS]
+    return [prefix_range(index, clitic + token, *span) for clitic, span in zip(PREFIX_CLITICS, old_spans)]
+
+
+def _prefix_hits(index, spans, candidates):
+    postings = index["postings"]
+    vocab = index["vocab"]
+    hits = set()
+    for lo, hi in spans:
+        for token in vocab[lo:hi]:
+            hits.update(postings[token].keys())
+            if candidates is not None and len(hits) >= len(candidates) and candidates <= hits:
+                return set(candidates)
+    return hits if candidates is None else hits & candidates
+
+
+def prefix_search(index, norm_text, previous=None):
+    """Articles containing a token starting with each typed word (after an
+    optional proclitic), for search-as-you-type.
+
+    ``previous`` is the state returned for the last keystroke: unchanged
+    words are reused and a word that was extended only re-scans the
+    vocabulary ranges and the article set of its shorter prefix.
+    """
+    old_terms = previous["terms"] if previous else []
+    terms = []
+    hits = None
+    reusable = True
+    for i, token in enumerate(tokenize(norm_text)):
+        old = old_terms[i] if reusable and i < len(old_terms) else None
+        if old is not None and old["token"] == token:
+            terms.append(old)
+            hits = old["hits"]
+            continue
+        reusable = False
+        if old is not None and token.startswith(old["token"]):
+            spans = _prefix_spans(index, token, old["spans"])
+            candidates = old["hits"]
+        else:
+            spans = _prefix_spans(index, token)
+            candidates = hits
+        hits = _prefix_hits(index, spans, candidates)
+        terms.append({"token": token, "spans": spans, "hits": hits})
+    return {"text": norm_text, "terms": terms, "hits": hits if hits is not None else set()}
+
+
+def parse_article_numbers(text):
+    text = normalize_arabic_numbers(text.strip())
+    match = ARTICLE_RANGE_RE.match(text)
+    if match:
+        low, high = sorted((int(match.group(1)), int(match.group(2))))
+        high = min(high, low + MAX_ARTICLE_RANGE - 1)
+        return [str(n) for n in range(low, high + 1)]
+    if re.fullmatch(r"\d+(?:[,،\s]+\d+)+", text):
+        return list(dict.fromkeys(ARTICLE_LIST_SPLIT_RE.split(text)))
+    return [text] if text else []
+
+
+def find_articles_by_number(index, law_name, article_numbers):
+    hits = []
+    for num in article_numbers:
+        hits.extend(index["articles_by_num"].get((law_name, num), ()))
+    return hits
+
@@ -0,0 +1,161 @@
+"""Process-wide search metrics, exported in the Prometheus text format.
+
+    with timed("match"):
+        ...
+    METRICS.incr("searches_total", kind="keywords")
+    METRICS.render_prometheus()
+"""
+import cProfile
+import io
+import pstats
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+METRICS_PREFIX = "law_"
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+RESULT_COUNT_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+METRIC_HELP = {
+    "stage_seconds": "Latency of each search pipeline stage.",
+    "search_results": "Number of articles matched per search.",
+    "searches_total": "Searches run, by query kind.",
+    "batch_search_terms": "Number of terms per batch search.",
+    "query_cache_lookups_total": "Query result cache lookups, by result.",
+    "export_cache_lookups_total": "Word export cache lookups, by result.",
+    "corpus_articles": "Articles in the current corpus snapshot.",
+    "corpus_files": "Law files in the current corpus snapshot.",
+    "corpus_file_errors": "Law files that could not be read.",
+}
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (inf past the last bucket)."""
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            seen += n
+            if seen >= rank and n:
+                return bound
+        return float("inf")
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+def _format_value(value):
+    return "+Inf" if value == float("inf") else repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._gauges = {}
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def incr(self, name, amount=1, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set_gauge(self, name, value, **labels):
+        with self._lock:
+            self._gauges[(name, _labels(labels))] = value
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("stage_seconds", time.perf_counter() - start, stage=stage)
+
+    def stage_summary(self):
+        """Rows of per-stage latency statistics (milliseconds) for the admin panel."""
+        with self._lock:
+            stages = [(dict(labels)["stage"], h) for (name, labels), h in self._histograms.items()
+                      if name == "stage_seconds"]
+            return [
+                {
+                    "stage": stage,
+                    "count": h.count,
+                    "mean_ms": round(h.sum / h.count * 1000, 3) if h.count else 0.0,
+                    "p50_ms": h.quantile(0.5) * 1000,
+                    "p95_ms": h.quantile(0.95) * 1000,
+                    "p99_ms": h.quantile(0.99) * 1000,
+                    "total_s": round(h.sum, 3),
+                }
+                for stage, h in sorted(stages, key=lambda item: item[0])
+            ]
+
+    def render_prometheus(self):
+        out = []
+        with self._lock:
+            families = {}
+            for kind, items in (("histogram", self._histograms), ("counter", self._counters), ("gauge", self._gauges)):
+                for (name, labels), value in items.items():
+                    families.setdefault((name, kind), []).append((labels, value))
+            for (name, kind), series in sorted(families.items()):
+                full = METRICS_PREFIX + name
+                if name in METRIC_HELP:
+                    out.append(f"# HELP {full} {METRIC_HELP[name]}")
+                out.append(f"# TYPE {full} {kind}")
+                for labels, value in sorted(series, key=lambda item: item[0]):
+                    if kind != "histogram":
+                        out.append(f"{full}{_format_labels(labels)} {_format_value(value)}")
+                        continue
+                    cumulative = 0
+                    for bound, n in zip(value.buckets + (float("inf"),), value.counts):
+                        cumulative += n
+                        le = _format_labels(labels, [("le", _format_value(float(bound)))])
+                        out.append(f"{full}_bucket{le} {cumulative}")
+                    out.append(f"{full}_sum{_format_labels(labels)} {value.sum!r}")
+                    out.append(f"{full}_count{_format_labels(labels)} {value.count}")
+        return "\n".join(out) + "\n"
+
+
+METRICS = Metrics()
+
+
+def timed(stage):
+    return METRICS.timer(stage)
+
+
+def profile_call(fn, *args, dump_path=None, top=30, **kwargs):
+    """Run ``fn`` under cProfile; returns (result, report text) and dumps stats if asked."""
+    profiler = cProfile.Profile()
+    result = profiler.runcall(fn, *args, **kwargs)
+    if dump_path:
+        profiler.dump_stats(dump_path)
+    report = io.StringIO()
+    pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(top)
+    return result, report.getvalue()
@@ -0,0 +1,251 @@
+"""Boolean and proximity search queries, evaluated on the positional index.
+
+Syntax (operators are case-insensitive):
+
+    ايجار AND فسخ               both
+    ايجار OR بيع , هبة          either (a comma is OR as well)
+    عقد NOT بيع , -بيع          exclude
+    "عقد البيع"                 phrase; bare adjacent words form a phrase too
+    مؤجر NEAR/5 مستأجر          within 5 words (also قرب/5)
+    (ايجار OR بيع) AND -منقول   grouping
+"""
+import bisect
+import re
+
+from arabic_text import normalize_arabic_text
+from law_index import keyword_occurrences, tokenize
+
+QUERY_TOKEN_RE = re.compile(r'"([^"]*)"|«([^»]*)»|(\()|(\))|([,،])|([^\s()"«»,،]+)')
+NEAR_RE = re.compile(r"^(?:NEAR|قرب)/(\d+)$", re.IGNORECASE)
+OPERATOR_WORDS = {"AND": "and", "&": "and", "OR": "or", "|": "or", "NOT": "not"}
+
+
+class QuerySyntaxError(ValueError):
+    pass
+
+
+def _operator(word):
+    op = OPERATOR_WORDS.get(word.upper())
+    if op:
+        return (op,)
+    match = NEAR_RE.match(word)
+    if match:
+        return ("near", int(match.group(1)))
+    return None
+
+
+def _lex(text):
+    tokens = []
+    words = []
+
+    def flush():
+        if words:
+            tokens.append(("phrase", " ".join(words)))
+            words.clear()
+
+    for match in QUERY_TOKEN_RE.finditer(text):
+        quoted, guillemets, lparen, rparen, comma, word = match.groups()
+        if word is not None:
+            op = _operator(word)
+            if op is None and word.startswith("-") and len(word) > 1:
+                # "-word" negates that word alone, never the phrase around it.
+                flush()
+                tokens.append(("not",))
+                tokens.append(("phrase", word[1:]))
+            elif op is None:
+                words.append(word)
+            else:
+                flush()
+                tokens.append(op)
+            continue
+        flush()
+        if quoted is not None or guillemets is not None:
+            tokens.append(("phrase", quoted if quoted is not None else guillemets))
+        elif lparen:
+            tokens.append(("(",))
+        elif rparen:
+            tokens.append((")",))
+        else:
+            tokens.append(("or",))
+    flush()
+    return tokens
+
+
+def is_boolean_query(text):
+    """Whether ``text`` uses the query syntax rather than a plain comma-separated list."""
+    if '"' in text or "«" in text:
+        return True
+    return any(_operator(w) or (w.startswith("-") and len(w) > 1) for w in text.split())
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def parse(self):
+        node = self.parse_or()
+        if self.peek() is not None:
+            raise QuerySyntaxError("قوس إغلاق زائد أو عامل في غير موضعه.")
+        return node
+
+    def parse_or(self):
+        nodes = [self.parse_and()]
+        while self.peek() == ("or",):
+            self.take()
+            nodes.append(self.parse_and())
+        return nodes[0] if len(nodes) == 1 else ("or",) + tuple(nodes)
+
+    def parse_and(self):
+        nodes = [self.parse_near()]
+        while self.peek() is not None and self.peek()[0] in ("and", "not", "phrase", "("):
+            if self.peek() == ("and",):
+                self.take()
+            nodes.append(self.parse_near())
+        return nodes[0] if len(nodes) == 1 else ("and",) + tuple(nodes)
+
+    def parse_near(self):
+        node = self.parse_unary()
+        pairs = []
+        while self.peek() is not None and self.peek()[0] == "near":
+            distance = self.take()[1]
+            right = self.parse_unary()
+            left = pairs[-1][3] if pairs else node
+            if left[0] != "term" or right[0] != "term":
+                raise QuerySyntaxError("يجب أن يكون طرفا NEAR كلمتين أو عبارتين.")
+            pairs.append(("near", distance, left, right))
+        if not pairs:
+            return node
+        # a NEAR b NEAR c means (a NEAR b) AND (b NEAR c).
+        return pairs[0] if len(pairs) == 1 else ("and",) + tuple(pairs)
+
+    def parse_unary(self):
+        token = self.take()
+        if token is None:
+            raise QuerySyntaxError("الاستعلام غير مكتمل.")
+        if token == ("not",):
+            return ("not", self.parse_unary())
+        if token == ("(",):
+            node = self.parse_or()
+            if self.take() != (")",):
+                raise QuerySyntaxError("قوس غير مغلق.")
+            return node
+        if token[0] == "phrase":
+            norm = normalize_arabic_text(token[1])
+            if not norm:
+                raise QuerySyntaxError("عبارة فارغة في الاستعلام.")
+            return ("term", norm)
+        raise QuerySyntaxError("عامل في غير موضعه.")
+
+
+def parse_query(text):
+    """Parse a query into a nested tuple tree of term/and/or/not/near nodes."""
+    tokens = _lex(text)
+    if not tokens:
+        raise QuerySyntaxError("الاستعلام فارغ.")
+    return _Parser(tokens).parse()
+
+
+def query_terms(node, negated=False):
+    """Normalized terms that must appear in matches (for highlighting and ranking)."""
+    if node[0] == "term":
+        return [] if negated else [node[1]]
+    if node[0] == "not":
+        return query_terms(node[1], not negated)
+    children = node[2:] if node[0] == "near" else node[1:]
+    terms = []
+    for child in children:
+        terms.extend(t for t in query_terms(child, negated) if t not in terms)
+    return terms
+
+
+def intersect_sorted(a, b):
+    """Galloping intersection of two sorted id lists."""
+    if len(a) > len(b):
+        a, b = b, a
+    out = []
+    lo = 0
+    n = len(b)
+    for x in a:
+        if lo >= n:
+            break
+        bound = 1
+        while lo + bound < n and b[lo + bound] < x:
+            bound *= 2
+        lo = bisect.bisect_left(b, x, lo + bound // 2, min(lo + bound + 1, n))
+        if lo < n and b[lo] == x:
+            out.append(x)
+            lo += 1
+    return out
+
+
+def _near(left, left_len, right, right_len, distance):
+    for start in left:
+        end = start + left_len - 1
+        # Right occurrences whose span lies within ``distance`` words of [start, end].
+        i = bisect.bisect_left(right, start - distance - right_len + 1)
+        if i < len(right) and right[i] <= end + distance:
+            return True
+    return False
+
+
+class _Evaluator:
+    def __init__(self, index, exact_match, morphology):
+        self.index = index
+        self.exact_match = exact_match
+        self.morphology = morphology
+        self.occurrences = {}
+
+    def term(self, norm):
+        if norm not in self.occurrences:
+            self.occurrences[norm] = keyword_occurrences(self.index, norm, self.exact_match, self.morphology)
+        return self.occurrences[norm]
+
+    def ids(self, node):
+        kind = node[0]
+        if kind == "term":
+            return sorted(self.term(node[1]))
+        if kind == "near":
+            _, distance, (_, a), (_, b) = node
+            left, right = self.term(a), self.term(b)
+            a_len, b_len = len(tokenize(a)), len(tokenize(b))
+            return [
+                i for i in intersect_sorted(sorted(left), sorted(right))
+                if _near(left[i], a_len, right[i], b_len, distance)
+            ]
+        if kind == "not":
+            excluded = set(self.ids(node[1]))
+            return [i for i in range(self.index["size"]) if i not in excluded]
+        if kind == "or":
+            merged = set()
+            for child in node[1:]:
+                merged.update(self.ids(child))
+            return sorted(merged)
+        positive = [child for child in node[1:] if child[0] != "not"]
+        negative = [child[1] for child in node[1:] if child[0] == "not"]
+        if not positive:
+            return self.ids(("not", ("or",) + tuple(negative)))
+        lists = sorted((self.ids(child) for child in positive), key=len)
+        result = lists[0]
+        for ids in lists[1:]:
+            if not result:
+                break
+            result = intersect_sorted(result, ids)
+        for child in negative:
+            if not result:
+                break
+            excluded = set(self.ids(child))
+            result = [i for i in result if i not in excluded]
+        return result
+
+
+def evaluate_query(index, node, exact_match=False, morphology=None):
+    return set(_Evaluator(index, exact_match, morphology).ids(node))
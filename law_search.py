@@ -0,0 +1,486 @@
+"""Headless law search engine and batch CLI.
+
+The same pipeline the Streamlit app runs, without any UI:
+
+    python law_search.py queries.txt -o results.jsonl --ranked --limit 20
+
+Each non-empty line of the query file is one query (comma-separated
+keywords or the boolean syntax of ``law_query``, as in the search form);
+each output line is one JSON object. With ``--matrix`` the lines are
+plain terms, matched together, and the output is the CSV hit matrix.
+"""
+import argparse
+import json
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from arabic_text import normalize_arabic_text
+from law_corpus import CorpusStore, law_name_from_file
+from law_export import export_batch_to_csv, export_batch_to_word
+from law_highlight import cached_highlight
+from law_index import (
+    MATCH_FUZZY,
+    MATCH_STEM,
+    batch_keyword_occurrences,
+    find_articles_by_number,
+    find_keywords,
+    parse_article_numbers,
+    rank_articles,
+    tokenize,
+    word_variants,
+)
+from law_metrics import METRICS, RESULT_COUNT_BUCKETS, profile_call, timed
+from law_query import QuerySyntaxError, evaluate_query, is_boolean_query, parse_query, query_terms
+
+DEFAULT_LAWS_DIR = "laws"
+ORDER_DOCUMENT = "document"
+ORDER_RELEVANCE = "relevance"
+QUERY_CACHE_SIZE = 256
+BATCH_TERM_SPLIT_RE = re.compile(r"[\n,،;؛]+")
+UNREADABLE_FILE_MESSAGE = "⚠️ تعذر قراءة الملف {file}: {error}. يرجى التأكد من أنه ملف DOCX صالح."
+
+
+@dataclass(frozen=True)
+class SearchQuery:
+    keywords: tuple
+    normalized_keywords: tuple
+    article_numbers: tuple
+    laws: Optional[tuple] = None
+    exact: bool = False
+    order: str = ORDER_DOCUMENT
+    limit: Optional[int] = None
+    expression: Optional[tuple] = None
+    morphology: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    article_id: int
+    law: str
+    num: str
+    text: str
+
+
+@dataclass
+class SearchResponse:
+    query: SearchQuery
+    corpus_version: str
+    article_ids: List[int]
+    total: int
+    warnings: List[str] = field(default_factory=list)
+
+
+@dataclass
+class BatchResponse:
+    terms: List[str]
+    corpus_version: str
+    hits: Dict[str, Dict[int, int]]
+    warnings: List[str] = field(default_factory=list)
+
+
+_default_store = None
+
+
+def default_store(laws_dir: str = DEFAULT_LAWS_DIR) -> CorpusStore:
+    global _default_store
+    if _default_store is None or _default_store.laws_dir != laws_dir:
+        _default_store = CorpusStore(laws_dir)
+    return _default_store
+
+
+def parse_keywords(text: str) -> List[str]:
+    return [k.strip() for k in text.split(",") if k.strip()] if text else []
+
+
+def build_query(
+    query: str = "",
+    laws: Optional[Iterable[str]] = None,
+    exact: bool = False,
+    article: str = "",
+    order: str = ORDER_DOCUMENT,
+    limit: Optional[int] = None,
+    morphology: Optional[str] = None,
+) -> SearchQuery:
+    """Build a query; raises ``QuerySyntaxError`` for a malformed boolean query.
+
+    ``morphology`` is ``MATCH_STEM`` or ``MATCH_FUZZY`` to match words by
+    stem (and, for fuzzy, stems one typo away) instead of as written.
+    """
+    expression = None
+    if query and is_boolean_query(query):
+        expression = parse_query(query)
+        keywords = [query.strip()]
+        normalized_keywords = query_terms(expression)
+    else:
+        keywords = parse_keywords(query)
+        normalized_keywords = [normalize_arabic_text(kw) for kw in keywords]
+    return SearchQuery(
+        keywords=tuple(keywords),
+        normalized_keywords=tuple(normalized_keywords),
+        article_numbers=tuple(parse_article_numbers(article)) if article.strip() else (),
+        laws=tuple(laws) if laws is not None else None,
+        exact=exact,
+        order=order,
+        limit=limit,
+        expression=expression,
+        morphology=morphology,
+    )
+
+
+def _resolve_law_files(corpus: Dict, laws: Optional[Sequence[str]]) -> List[str]:
+    if laws is None:
+        return list(corpus["files"])
+    by_name = {law_name_from_file(f): f for f in corpus["files"]}
+    return [f for f in (by_name.get(law, law) for law in laws) if f in corpus["law_ranges"]]
+
+
+def query_kind(q: SearchQuery) -> str:
+    if q.expression is not None:
+        return "boolean"
+    if q.normalized_keywords:
+        return q.morphology or "keywords"
+    return "article_number"
+
+
+def run_query(corpus: Dict, q: SearchQuery) -> SearchResponse:
+    with timed("search"):
+        response = _run_query(corpus, q)
+    METRICS.incr("searches_total", kind=query_kind(q))
+    METRICS.observe("search_results", response.total, buckets=RESULT_COUNT_BUCKETS)
+    return response
+
+
+def _run_query(corpus: Dict, q: SearchQuery) -> SearchResponse:
+    index = corpus["index"]
+    with timed("match"):
+        if q.expression is not None:
+            keyword_hits = evaluate_query(index, q.expression, exact_match=q.exact, morphology=q.morphology)
+        else:
+            keyword_hits = find_keywords(index, q.normalized_keywords, exact_match=q.exact, morphology=q.morphology)
+    number_hits = set()
+    law_keyword_hits = set()
+    warnings = []
+    for file in _resolve_law_files(corpus, q.laws):
+        if file in corpus["errors"]:
+            warnings.append(UNREADABLE_FILE_MESSAGE.format(file=file, error=corpus["errors"][file]))
+            continue
+        start, end = corpus["law_ranges"][file]
+        law_keyword_hits.update(i for i in keyword_hits if start <= i < end)
+        if q.article_numbers:
+            number_hits.update(find_articles_by_number(index, law_name_from_file(file), q.article_numbers))
+    total = len(law_keyword_hits | number_hits)
+    if q.order == ORDER_RELEVANCE and law_keyword_hits:
+        with timed("rank"):
+            ranked = rank_articles(
+                index, q.normalized_keywords, q.exact, candidates=law_keyword_hits, limit=q.limit, morphology=q.morphology
+            )
+        if len(ranked) < len(law_keyword_hits) and (q.limit is None or len(ranked) < q.limit):
+            # Boolean matches can contain none of the positive terms (e.g. "a OR NOT b").
+            seen = set(ranked)
+            ranked.extend(i for i in sorted(law_keyword_hits) if i not in seen)
+        article_ids = sorted(number_hits)
+        article_ids.extend(i for i in ranked if i not in number_hits)
+    else:
+        article_ids = sorted(law_keyword_hits | number_hits)
+    if q.limit is not None:
+        article_ids = article_ids[:q.limit]
+    return SearchResponse(q, corpus["version"], article_ids, total, warnings)
+
+
+class QueryCache:
+    """Process-wide LRU of search results for the current corpus version.
+
+    Keys use the normalized keywords, so spelling variants that normalize
+    the same share an entry. A new corpus version drops every entry.
+    """
+
+    def __init__(self, max_entries: int = QUERY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.corpus_version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(q: SearchQuery) -> tuple:
+        return (q.normalized_keywords, q.expression, q.morphology, q.laws, q.exact, q.article_numbers, q.order, q.limit)
+
+    def _check_version(self, corpus_version: str) -> None:
+        if corpus_version != self.corpus_version:
+            self._entries.clear()
+            self.corpus_version = corpus_version
+
+    def get(self, corpus_version: str, q: SearchQuery) -> Optional[tuple]:
+        with self._lock:
+            self._check_version(corpus_version)
+            entry = self._entries.get(self.key(q))
+            if entry is None:
+                self.misses += 1
+                METRICS.incr("query_cache_lookups_total", result="miss")
+                return None
+            self._entries.move_to_end(self.key(q))
+            self.hits += 1
+            METRICS.incr("query_cache_lookups_total", result="hit")
+            return entry
+
+    def put(self, corpus_version: str, q: SearchQuery, entry: tuple) -> None:
+        with self._lock:
+            self._check_version(corpus_version)
+            self._entries[self.key(q)] = entry
+            self._entries.move_to_end(self.key(q))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+_default_query_cache = None
+
+
+def default_query_cache() -> QueryCache:
+    global _default_query_cache
+    if _default_query_cache is None:
+        _default_query_cache = QueryCache()
+    return _default_query_cache
+
+
+def cached_run_query(corpus: Dict, q: SearchQuery, cache: Optional[QueryCache] = None) -> SearchResponse:
+    """``run_query`` through a shared ``QueryCache`` (the module default if None)."""
+    if cache is None:
+        cache = default_query_cache()
+    entry = cache.get(corpus["version"], q)
+    if entry is None:
+        response = run_query(corpus, q)
+        cache.put(corpus["version"], q, (tuple(response.article_ids), response.total, tuple(response.warnings)))
+        return response
+    article_ids, total, warnings = entry
+    return SearchResponse(q, corpus["version"], list(article_ids), total, list(warnings))
+
+
+def search(
+    query: str = "",
+    laws: Optional[Iterable[str]] = None,
+    exact: bool = False,
+    article: str = "",
+    order: str = ORDER_DOCUMENT,
+    limit: Optional[int] = None,
+    corpus: Optional[Dict] = None,
+    morphology: Optional[str] = None,
+) -> SearchResponse:
+    """Search the laws; ``laws`` takes file or law names (None means all)."""
+    if corpus is None:
+        corpus = default_store().snapshot()
+    return cached_run_query(corpus, build_query(query, laws, exact, article, order, limit, morphology))
+
+
+def highlight_terms(corpus: Dict, q: SearchQuery) -> tuple:
+    """(keywords, exact) to pass to the highlighter for this query's matches."""
+    if not q.morphology:
+        return q.normalized_keywords, q.exact
+    words = dict.fromkeys(w for kw in q.normalized_keywords for w in tokenize(kw))
+    variants = dict.fromkeys(t for w in words for t in word_variants(corpus["index"], w, q.morphology, q.exact))
+    return tuple(variants), True
+
+
+def response_results(corpus: Dict, response: SearchResponse, highlight: bool = False) -> List[SearchResult]:
+    results = []
+    keywords, exact = highlight_terms(corpus, response.query) if highlight else ((), False)
+    with timed("highlight" if keywords else "results"):
+        for article_id in response.article_ids:
+            article = corpus["articles"][article_id]
+            text = article["plain"]
+            if keywords:
+                text = cached_highlight(text, keywords, exact)
+            results.append(SearchResult(article_id, article["law"], article["num"], text))
+    return results
+
+
+def parse_batch_terms(text: str) -> List[str]:
+    """Terms of a pasted or uploaded list: one per line or comma-separated, duplicates dropped."""
+    terms = {}
+    for term in BATCH_TERM_SPLIT_RE.split(text or ""):
+        term = term.strip()
+        if term:
+            terms.setdefault(normalize_arabic_text(term), term)
+    return list(terms.values())
+
+
+def batch_search(
+    corpus: Dict,
+    terms: Sequence[str],
+    laws: Optional[Iterable[str]] = None,
+    exact: bool = False,
+    morphology: Optional[str] = None,
+) -> BatchResponse:
+    """Occurrence counts of every term in every article, matching all terms together.
+
+    ``hits[term]`` maps article ids (ascending) to the number of times the
+    term occurs there; terms are keywords, not boolean expressions.
+    """
+    normalized = {term: normalize_arabic_text(term) for term in terms}
+    with timed("batch_match"):
+        occurrences = batch_keyword_occurrences(corpus["index"], normalized.values(), exact, morphology)
+    ranges = []
+    warnings = []
+    for file in _resolve_law_files(corpus, tuple(laws) if laws is not None else None):
+        if file in corpus["errors"]:
+            warnings.append(UNREADABLE_FILE_MESSAGE.format(file=file, error=corpus["errors"][file]))
+            continue
+        ranges.append(corpus["law_ranges"][file])
+    hits = {}
+    for term, kw in normalized.items():
+        found = occurrences.get(kw, {})
+        article_ids = sorted(found)
+        if len(ranges) < len(corpus["law_ranges"]):
+            article_ids = [i for i in article_ids if any(start <= i < end for start, end in ranges)]
+        hits[term] = {i: len(found[i]) for i in article_ids}
+    METRICS.observe("batch_search_terms", len(terms), buckets=RESULT_COUNT_BUCKETS)
+    return BatchResponse(list(terms), corpus["version"], hits, warnings)
+
+
+def batch_matrix_rows(corpus: Dict, response: BatchResponse) -> List[tuple]:
+    """(term, law, article number, occurrences) rows of the hit matrix, in term and document order."""
+    articles = corpus["articles"]
+    rows = []
+    for term in response.terms:
+        for article_id, count in response.hits[term].items():
+            article = articles[article_id]
+            rows.append((term, article["law"], article["num"], count))
+    return rows
+
+
+def export_batch_matrix(
+    corpus: Dict,
+    terms: Sequence[str],
+    laws: Optional[Iterable[str]] = None,
+    exact: bool = False,
+    morphology: Optional[str] = None,
+    word: bool = False,
+) -> bytes:
+    """The batch_search() hit matrix as a Word document (``word``) or CSV file."""
+    response = batch_search(corpus, terms, laws, exact, morphology)
+    rows = batch_matrix_rows(corpus, response)
+    return export_batch_to_word(response.terms, rows) if word else export_batch_to_csv(rows)
+
+
+def profile_query(corpus: Dict, q: SearchQuery, dump_path: Optional[str] = None) -> tuple:
+    """Run one uncached query under cProfile: (response, report text)."""
+    return profile_call(run_query, corpus, q, dump_path=dump_path)
+
+
+def non_negative_int(text: str) -> int:
+    value = int(text)
+    if value < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, got {value}")
+    return value
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Batch search over the Yemeni laws corpus (JSONL output).")
+    parser.add_argument("queries", help="file with one query per line ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file (default: stdout)")
+    parser.add_argument("--laws-dir", default=DEFAULT_LAWS_DIR)
+    parser.add_argument("--law", action="append", dest="laws", help="restrict to a law (repeatable)")
+    parser.add_argument("--exact", action="store_true", help="whole-word matching")
+    morphology = parser.add_mutually_exclusive_group()
+    morphology.add_argument("--stem", action="store_const", dest="morphology", const=MATCH_STEM,
+                            help="match words by stem (العقود, بالعقد, عقدين ~ عقد)")
+    morphology.add_argument("--fuzzy", action="store_const", dest="morphology", const=MATCH_FUZZY,
+                            help="stem matching that also tolerates one typo")
+    parser.add_argument("--article", default="", help="also look up these article numbers")
+    parser.add_argument("--ranked", action="store_true", help="order results by BM25 relevance")
+    parser.add_argument("--limit", type=non_negative_int, default=None)
+    parser.add_argument("--text", action="store_true", help="include article text in the output")
+    parser.add_argument("--matrix", action="store_true",
+                        help="treat each line as a term and write the term x law x article hit matrix as CSV")
+    parser.add_argument("--profile", metavar="PATH", help="write a cProfile dump of the batch to PATH")
+    parser.add_argument("--metrics", action="store_true", help="print stage metrics to stderr at the end")
+    args = parser.parse_args(argv)
+    run = _run_matrix if args.matrix else _run_batch
+    if args.profile:
+        _, report = profile_call(run, args, dump_path=args.profile)
+        sys.stderr.write(report)
+    else:
+        run(args)
+    if args.metrics:
+        sys.stderr.write(METRICS.render_prometheus())
+    return 0
+
+
+def _run_matrix(args) -> None:
+    corpus = default_store(args.laws_dir).snapshot()
+    if args.queries == "-":
+        text = sys.stdin.read()
+    else:
+        with open(args.queries, encoding="utf-8-sig") as f:
+            text = f.read()
+    response = batch_search(corpus, parse_batch_terms(text), args.laws, args.exact, args.morphology)
+    for warning in response.warnings:
+        sys.stderr.write(warning + "\n")
+    data = export_batch_to_csv(batch_matrix_rows(corpus, response))
+    if args.output == "-":
+        sys.stdout.buffer.write(data)
+    else:
+        with open(args.output, "wb") as f:
+            f.write(data)
+
+
+def _run_batch(args) -> None:
+    corpus = default_store(args.laws_dir).snapshot()
+    order = ORDER_RELEVANCE if args.ranked else ORDER_DOCUMENT
+    source = sys.stdin if args.queries == "-" else open(args.queries, encoding="utf-8")
+    sink = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        for line in source:
+            query = line.strip()
+            if not query:
+                continue
+            start = time.perf_counter()
+            try:
+                q = build_query(query, args.laws, args.exact, args.article, order, args.limit, args.morphology)
+            except QuerySyntaxError as e:
+                sink.write(json.dumps({"query": query, "error": str(e)}, ensure_ascii=False) + "\n")
+                continue
+            response = run_query(corpus, q)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            results = []
+            for r in response_results(corpus, response):
+                item = asdict(r)
+                if not args.text:
+                    del item["text"]
+                results.append(item)
+            sink.write(json.dumps({
+                "query": query,
+                "total": response.total,
+                "elapsed_ms": round(elapsed_ms, 3),
+                "corpus_version": response.corpus_version,
+                "warnings": response.warnings,
+                "results": results,
+            }, ensure_ascii=False) + "\n")
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+"""Activation codes and free-trial registrations in a SQLite (WAL) database.
+
+Codes are stored only as SHA-256 hashes and redeemed with a single
+conditional UPDATE, so a code can be spent once even when several
+sessions submit it at the same time. The old activation_codes.txt is
+imported once by the operator, then deleted so no plaintext copy
+outlives the import:
+
+    python license_store.py migrate
+
+The app never reads the codes file itself, so a new or lost database
+holds no codes (and the app says so) rather than every code again
+unspent. trial_users.txt is imported at every start: the earliest start
+of a device wins, so importing it again cannot extend a trial.
+
+The database path defaults to license.db and can be set with the
+LAW_LICENSE_DB environment variable; it must live on storage that
+outlasts the container.
+"""
+import argparse
+import csv
+import hashlib
+import os
+import sqlite3
+import time
+
+LICENSE_DB_ENV = "LAW_LICENSE_DB"
+LICENSE_DB_FILE = os.environ.get(LICENSE_DB_ENV, "license.db")
+LICENSE_FORMAT_VERSION = 1
+LICENSE_DB_TIMEOUT = 10.0
+
+
+def code_hash(code):
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+
+def _content_sha1(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def open_license_db(db_path):
+    conn = sqlite3.connect(db_path, timeout=LICENSE_DB_TIMEOUT, isolation_level=None)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    if conn.execute("PRAGMA user_version").fetchone()[0] == 0:
+        conn.executescript(f"""
+            BEGIN IMMEDIATE;
+            CREATE TABLE IF NOT EXISTS codes (
+                code_hash TEXT PRIMARY KEY,
+                redeemed_at REAL,
+                device_id TEXT
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS trials (
+                device_id TEXT PRIMARY KEY,
+                started_at REAL NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS imports (
+                source TEXT PRIMARY KEY,
+                sha1 TEXT NOT NULL,
+                imported_at REAL NOT NULL
+            );
+            PRAGMA user_version = {LICENSE_FORMAT_VERSION};
+            COMMIT;
+        """)
+    return conn
+
+
+def _needs_import(conn, path):
+    if not os.path.exists(path):
+        return None
+    sha1 = _content_sha1(path)
+    row = conn.execute("SELECT sha1 FROM imports WHERE source = ?", (os.path.abspath(path),)).fetchone()
+    return None if row and row[0] == sha1 else sha1
+
+
+def import_codes_file(conn, path):
+    """Add the codes listed in ``path`` (one per line); known codes keep their state."""
+    sha1 = _needs_import(conn, path)
+    if sha1 is None:
+        return 0
+    with open(path, "r") as f:
+        hashes = [(code_hash(line.strip()),) for line in f if line.strip()]
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        before = conn.total_changes
+        conn.executemany("INSERT OR IGNORE INTO codes (code_hash) VALUES (?)", hashes)
+        added = conn.total_changes - before
+        conn.execute(
+            "INSERT OR REPLACE INTO imports (source, sha1, imported_at) VALUES (?, ?, ?)",
+            (os.path.abspath(path), sha1, time.time()),
+        )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return added
+
+
+def import_trials_file(conn, path):
+    """Add the (device_id, start time) rows of the old CSV; the earliest start wins."""
+    sha1 = _needs_import(conn, path)
+    if sha1 is None:
+        return 0
+    with open(path, "r") as f:
+        rows = [(row[0], float(row[1])) for row in csv.reader(f) if len(row) >= 2 and row[0]]
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT INTO trials (device_id, started_at) VALUES (?, ?) "
+            "ON CONFLICT (device_id) DO UPDATE SET started_at = min(started_at, excluded.started_at)",
+            rows,
+        )
+        added = conn.total_changes - before
+        conn.execute(
+            "INSERT OR REPLACE INTO imports (source, sha1, imported_at) VALUES (?, ?, ?)",
+            (os.path.abspath(path), sha1, time.time()),
+        )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return added
+
+
+def migrate(db_path, codes_file, trials_file):
+    """Import the text files into ``db_path`` and delete the codes file; returns (codes, trial rows) added."""
+    conn = open_license_db(db_path)
+    try:
+        codes = import_codes_file(conn, codes_file)
+        trials = import_trials_file(conn, trials_file)
+    finally:
+        conn.close()
+    # Only reached once the import committed.
+    if os.path.exists(codes_file):
+        os.remove(codes_file)
+    return codes, trials
+
+
+class LicenseStore:
+    def __init__(self, db_path=LICENSE_DB_FILE, trials_file=None):
+        self.db_path = db_path
+        conn = open_license_db(db_path)
+        try:
+            if trials_file:
+                import_trials_file(conn, trials_file)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        # One short-lived connection per call: sqlite3 connections are not shared across threads.
+        return open_license_db(self.db_path)
+
+    def has_codes(self):
+        """False until activation codes were imported with ``migrate``."""
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT 1 FROM codes LIMIT 1").fetchone() is not None
+        finally:
+            conn.close()
+
+    def trial_start(self, device_id):
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT started_at FROM trials WHERE device_id = ?", (device_id,)).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else None
+
+    def register_trial(self, device_id):
+        """Start the trial for ``device_id`` unless it already started; returns the start time."""
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT OR IGNORE INTO trials (device_id, started_at) VALUES (?, ?)", (device_id, time.time())
+            )
+            return conn.execute("SELECT started_at FROM trials WHERE device_id = ?", (device_id,)).fetchone()[0]
+        finally:
+            conn.close()
+
+    def redeem_code(self, code, device_id=None):
+        """Spend ``code``; True only for the one caller that redeemed an unused code."""
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "UPDATE codes SET redeemed_at = ?, device_id = ? WHERE code_hash = ? AND redeemed_at IS NULL",
+                (time.time(), device_id, code_hash(code)),
+            )
+            return cursor.rowcount == 1
+        finally:
+            conn.close()
+
+    def stats(self):
+        conn = self._connect()
+        try:
+            codes, redeemed = conn.execute("SELECT count(*), count(redeemed_at) FROM codes").fetchone()
+            trials = conn.execute("SELECT count(*) FROM trials").fetchone()[0]
+        finally:
+            conn.close()
+        return {"codes": codes, "redeemed": redeemed, "trials": trials}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the activation code and trial database.")
+    parser.add_argument("command", choices=["migrate", "stats"])
+    parser.add_argument("--db", default=LICENSE_DB_FILE)
+    parser.add_argument("--codes-file", default="activation_codes.txt")
+    parser.add_argument("--trials-file", default="trial_users.txt")
+    args = parser.parse_args()
+    if args.command == "migrate":
+        codes, trials = migrate(args.db, args.codes_file, args.trials_file)
+        print(f"imported {codes} new codes and {trials} trial rows into {args.db}; removed {args.codes_file}")
+    print(LicenseStore(args.db).stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,34 @@
 import streamlit as st
 import streamlit.components.v1 as components
-from docx import Document
-import re
 import uuid
 import os
 import time
 import html
-import csv
-from io import BytesIO
+import hmac
+import tempfile
+from array import array
+
+from arabic_text import normalize_arabic_numbers, normalize_arabic_text
+from law_citations import cited_articles, citing_articles
+from law_corpus import CorpusStore, law_articles, law_name_from_file, law_outline
+from law_export import CSV_MIME, DOCX_MIME, ExportJobs, batch_export_key, export_key
+from law_highlight import cached_highlight
+from law_index import MATCH_FUZZY, MATCH_STEM, prefix_search
+from law_metrics import METRICS, timed
+from law_query import QuerySyntaxError
+from license_store import LICENSE_DB_FILE, LicenseStore
+from law_search import (
+    ORDER_DOCUMENT,
+    ORDER_RELEVANCE,
+    QueryCache,
+    batch_search,
+    build_query,
+    cached_run_query,
+    export_batch_matrix,
+    highlight_terms,
+    parse_batch_terms,
+    profile_query,
+)
 
 st.set_page_config(
     page_title="القوانين اليمنية بآخر تعديلاتها حتى عام 2025م",
@@ -46,8 +67,24 @@ TRIAL_DURATION = 3 * 24 * 60 * 60
 TRIAL_USERS_FILE = "trial_users.txt"
 DEVICE_ID_FILE = "device_id.txt"
 ACTIVATED_FILE = "activated.txt"
-ACTIVATION_CODES_FILE = "activation_codes.txt"
 LAWS_DIR = "laws"
+ADMIN_TOKEN_ENV = "LAW_ADMIN_TOKEN"
+
+@st.cache_resource(show_spinner="جاري تحميل القوانين...")
+def get_corpus_store():
+    return CorpusStore(LAWS_DIR)
+
+@st.cache_resource
+def get_export_jobs():
+    return ExportJobs()
+
+@st.cache_resource
+def get_query_cache():
+    return QueryCache()
+
+@st.cache_resource
+def get_license_store():
+    return LicenseStore(LICENSE_DB_FILE, TRIAL_USERS_FILE)
 
 def get_device_id():
     if os.path.exists(DEVICE_ID_FILE):
@@ -59,126 +96,99 @@ def get_device_id():
     return new_id
 
 def get_trial_start(device_id):
-    if not os.path.exists(TRIAL_USERS_FILE):
-        return None
-    with open(TRIAL_USERS_FILE, "r") as f:
-        reader = csv.reader(f)
-        for row in reader:
-            if row and row[0] == device_id:
-                return float(row[1])
-    return None
+    return get_license_store().trial_start(device_id)
 
 def register_trial(device_id):
-    if not os.path.exists(TRIAL_USERS_FILE):
-        with open(TRIAL_USERS_FILE, "w", newline='') as f:
-            pass
-    with open(TRIAL_USERS_FILE, "a", newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow([device_id, time.time()])
+    get_license_store().register_trial(device_id)
 
 def is_activated():
     return os.path.exists(ACTIVATED_FILE)
 
 def activate_app(code):
-    if not os.path.exists(ACTIVATION_CODES_FILE):
+    if not get_license_store().redeem_code(code, get_device_id()):
         return False
-    with open(ACTIVATION_CODES_FILE, "r") as f:
-        codes = [line.strip() for line in f.readlines()]
-    if code in codes:
-        codes.remove(code)
-        with open(ACTIVATION_CODES_FILE, "w") as f:
-            for c in codes:
-                f.write(c + "\n")
-        with open(ACTIVATED_FILE, "w") as f:
-            f.write("activated")
-        return True
-    return False
-
-def highlight_keywords(text, keywords, normalized_keywords=None, exact_match=False, pre_normalized_text=None):
-    if not keywords:
-        return text
-    marked_spans = []
-    for kw in keywords:
-        if not kw:
-            continue
-        for m in re.finditer(r'(?<!\w)' + re.escape(kw) + r'(?!\w)', text, re.IGNORECASE):
-            marked_spans.append((m.start(), m.end(), "exact"))
-    if normalized_keywords:
-        normalized_text = pre_normalized_text if pre_normalized_text else normalize_arabic_text(text)
-        for i, norm_kw in enumerate(normalized_keywords):
-            if not norm_kw:
-                continue
-            original_kw = keywords[i]
-            if not exact_match:
-                for m in re.finditer(re.escape(original_kw), text, re.IGNORECASE):
-                    overlap = False
-                    for s, e, t in marked_spans:
-                        if not (m.end() <= s or m.start() >= e):
-                            overlap = True
-                            break
-                    if not overlap:
-                        marked_spans.append((m.start(), m.end(), "partial"))
-    if not marked_spans:
-        return text
-    marked_spans.sort(key=lambda x: x[0])
-    result = []
-    last_idx = 0
-    for s, e, t in marked_spans:
-        if s < last_idx:
-            continue
-        result.append(text[last_idx:s])
-        span_text = text[s:e]
-        if t == "exact":
-            result.append(f"<mark>{span_text}</mark>")
-        else:
-            result.append(f"<mark class=\"mark-soft\">{span_text}</mark>")
-        last_idx = e
-    result.append(text[last_idx:])
-    return "".join(result)
-
-def export_results_to_word(results, filename="نتائج_البحث.docx"):
-    document = Document()
-    document.add_heading('نتائج البحث في القوانين اليمنية', level=1)
-    if not results:
-        document.add_paragraph("لم يتم العثور على نتائج للكلمات المفتاحية المحددة.")
-    else:
-        for i, r in enumerate(results):
-            document.add_heading(f"القانون: {r['law']} - المادة: {r['num']}", level=2)
-            document.add_paragraph(r['plain'])
-            if i < len(results) - 1:
-                document.add_page_break()
-    buffer = BytesIO()
-    document.save(buffer)
-    buffer.seek(0)
-    return buffer.getvalue()
-
-def normalize_arabic_numbers(text):
-    arabic_to_english = str.maketrans('٠١٢٣٤٥٦٧٨٩', '0123456789')
-    return text.translate(arabic_to_english)
-
-def normalize_arabic_text(text):
-    text = re.sub(r'(.)\1{2,}', r'\1', text)
-    text = re.sub(r'[\u064B-\u0652]', '', text)
-    text = re.sub('[إأآا]', 'ا', text)
-    text = re.sub('[ىي]', 'ي', text)
-    text = re.sub('[ة]', 'ه', text)
-    text = re.sub('ؤ', 'و', text)
-    text = re.sub('ئ', 'ي', text)
-    text = re.sub(r'[^\w\s]', '', text)
-    text = re.sub('\s+', ' ', text)
-    return text.strip()
-
-def render_law_file_viewer(files):
+    with open(ACTIVATED_FILE, "w") as f:
+        f.write("activated")
+    return True
+
+VIEWER_WINDOW_SIZE = 20
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def get_law_outline(corpus_version, law_file, _corpus):
+    return law_outline(law_articles(_corpus, law_file))
+
+def _set_viewer_start(start):
+    st.session_state.viewer_start = max(start, 0)
+
+def _jump_to_outline_entry(outline):
+    entry = st.session_state.viewer_outline_choice
+    if entry is not None:
+        _set_viewer_start(outline[entry][2])
+
+def _jump_to_viewer_article(corpus, law_file):
+    num = normalize_arabic_numbers(st.session_state.viewer_article_jump.strip())
+    hits = corpus["index"]["articles_by_num"].get((law_name_from_file(law_file), num))
+    if hits:
+        _set_viewer_start(hits[0] - corpus["law_ranges"][law_file][0])
+        st.session_state.viewer_jump_missing = None
+    elif num:
+        st.session_state.viewer_jump_missing = num
+
+def render_law_file_viewer(corpus):
     st.markdown("<h4 style='text-align:center;'>اختر القانون الذي تريد تصفحه بالكامل:</h4>", unsafe_allow_html=True)
-    law_sel = st.selectbox("اختر القانون:", files, key="law_select_for_view")
+    law_sel = st.selectbox("اختر القانون:", corpus["files"], key="law_select_for_view")
     if law_sel:
-        doc = Document(os.path.join(LAWS_DIR, law_sel))
+        if law_sel in corpus["errors"]:
+            st.warning(f"⚠️ تعذر قراءة الملف {law_sel}: {corpus['errors'][law_sel]}. يرجى التأكد من أنه ملف DOCX صالح.")
+            return
         st.markdown(f"<h5 style='text-align:center;color:#1976d2'>{law_sel.replace('.docx','')}</h5>", unsafe_allow_html=True)
-        law_text = ""
-        for para in doc.paragraphs:
-            txt = para.text.strip()
-            if txt:
-                law_text += txt + "\n\n"
+        articles = law_articles(corpus, law_sel)
+        if st.session_state.get("viewer_law") != law_sel:
+            st.session_state.viewer_law = law_sel
+            st.session_state.viewer_start = 0
+            st.session_state.viewer_outline_choice = None
+            st.session_state.viewer_jump_missing = None
+        outline = get_law_outline(corpus["version"], law_sel, corpus)
+        nav_cols = st.columns([3, 1])
+        with nav_cols[0]:
+            if outline:
+                st.selectbox(
+                    "📑 جدول المحتويات:",
+                    range(len(outline)),
+                    index=None,
+                    placeholder="اختر بابًا أو فصلًا للانتقال إليه",
+                    format_func=lambda i: "\u00a0\u00a0\u00a0" * outline[i][0] + outline[i][1],
+                    key="viewer_outline_choice",
+                    on_change=_jump_to_outline_entry,
+                    args=(outline,),
+                )
+        with nav_cols[1]:
+            st.text_input(
+                "🔢 الانتقال إلى المادة رقم:",
+                key="viewer_article_jump",
+                on_change=_jump_to_viewer_article,
+                args=(corpus, law_sel),
+            )
+        if st.session_state.get("viewer_jump_missing"):
+            st.warning(f"لا توجد مادة برقم {st.session_state.viewer_jump_missing} في هذا القانون.")
+        last_start = max(len(articles) - 1, 0) // VIEWER_WINDOW_SIZE * VIEWER_WINDOW_SIZE
+        start = min(st.session_state.get("viewer_start", 0), last_start)
+        window = articles[start:start + VIEWER_WINDOW_SIZE]
+        law_text = "".join(txt + "\n\n" for article in window for txt in article["paragraphs"])
+        page_cols = st.columns([1, 3, 1])
+        with page_cols[0]:
+            st.button("➡️ السابق", key="viewer_prev", disabled=start == 0,
+                      on_click=_set_viewer_start, args=(start - VIEWER_WINDOW_SIZE,))
+        with page_cols[1]:
+            if window:
+                st.markdown(
+                    f"<div style='text-align:center;direction:rtl;'>من المادة ({window[0]['num']}) إلى المادة ({window[-1]['num']})"
+                    f" — الجزء {start // VIEWER_WINDOW_SIZE + 1} من {last_start // VIEWER_WINDOW_SIZE + 1}</div>",
+                    unsafe_allow_html=True,
+                )
+        with page_cols[2]:
+            st.button("التالي ⬅️", key="viewer_next", disabled=start >= last_start,
+                      on_click=_set_viewer_start, args=(start + VIEWER_WINDOW_SIZE,))
         st.markdown("""
         <style>
         textarea[disabled], .stTextArea textarea[disabled] {
@@ -208,7 +218,406 @@ def render_law_file_viewer(files):
         }
         </style>
         """, unsafe_allow_html=True)
-        st.text_area("القانون كامل:", law_text, height=550, key="full_law_view_text", disabled=True)
+        st.text_area("القانون كامل:", law_text, height=550, key=f"full_law_view_text_{law_sel}_{start}", disabled=True)
+
+RESULTS_PAGE_SIZES = [10, 20, 50, 100]
+RESULT_SORT_ORDERS = ["ترتيب المواد", "الأكثر صلة"]
+RANKED_RESULTS_LIMIT = 500
+MATCH_MODES = {
+    "كما كُتبت": None,
+    "بالجذر والاشتقاق": MATCH_STEM,
+    "تقريبي (مع الأخطاء الإملائية)": MATCH_FUZZY,
+}
+RESULTS_FRAME_MAX_HEIGHT = 2400
+LIVE_SEARCH_DELAY = "300ms"
+LIVE_SEARCH_MIN_CHARS = 2
+LIVE_RESULTS_SHOWN = 10
+CITATIONS_SHOWN = 10
+CITATIONS_ROW_HEIGHT = 45
+
+RESULTS_PAGE_STYLE = """
+<style>
+body {
+    margin: 0;
+    direction: rtl;
+    font-family: "Tahoma", "Arial", sans-serif;
+    color: %(color)s;
+    background: transparent;
+}
+details.result-item {
+    border: 1px solid %(border)s;
+    border-radius: 8px;
+    margin-bottom: 12px;
+    padding: 8px 12px;
+}
+details.result-item summary {
+    cursor: pointer;
+    font-weight: bold;
+    font-size: 16px;
+    padding: 4px 0;
+}
+.result-box-night {
+    background-color: %(box)s;
+    color: %(color)s;
+    padding: 20px;
+    margin: 10px 0;
+    border-radius: 10px;
+    border: 1px solid %(border)s;
+    text-align: right;
+}
+.result-box-night p {
+    font-size: 17px;
+    line-height: 1.8;
+    margin-top: 0px;
+    white-space: pre-line;
+}
+mark {
+    background: #ff9800;
+    color: #fff;
+}
+mark.mark-soft {
+    background: #ffd600;
+    color: #000;
+}
+details.citations {
+    margin: 6px 0;
+    font-size: 15px;
+}
+details.citations summary {
+    cursor: pointer;
+    color: %(link)s;
+}
+details.citation-item {
+    margin: 6px 16px;
+    padding: 6px 10px;
+    border-right: 3px solid %(border)s;
+}
+details.citation-item summary {
+    cursor: pointer;
+    font-weight: bold;
+}
+details.citation-item p {
+    white-space: pre-line;
+    line-height: 1.7;
+}
+.copy-material-btn {
+    display: inline-flex;
+    align-items: center;
+    gap: 10px;
+    background: %(btn)s;
+    color: #fff;
+    border: none;
+    border-radius: 30px;
+    font-size: 18px;
+    font-family: 'Cairo', 'Tajawal', sans-serif;
+    padding: 10px 22px;
+    cursor: pointer;
+    box-shadow: 0 4px 15px rgba(41, 128, 185, 0.4);
+    transition: all 0.3s ease;
+    margin-bottom: 10px;
+    direction: rtl;
+    white-space: nowrap;
+}
+.copy-material-btn:hover {
+    box-shadow: 0 6px 20px rgba(41, 128, 185, 0.6);
+    transform: translateY(-2px);
+}
+.copy-material-btn .copied-check {
+    display: none;
+}
+.copy-material-btn.copied .copy-icon {
+    display: none;
+}
+.copy-material-btn.copied .copied-check {
+    display: inline;
+    animation: fadein-check 0.5s ease-out;
+}
+@keyframes fadein-check {
+    0%% { opacity: 0; transform: scale(0.7); }
+    100%% { opacity: 1; transform: scale(1); }
+}
+</style>
+"""
+
+RESULTS_PAGE_THEMES = {
+    False: {"color": "#232323", "box": "#f1f8e9", "border": "#c5e1a5", "link": "#2980b9", "btn": "linear-gradient(90deg, #1abc9c 0%, #2980b9 100%)"},
+    True: {"color": "#fafafa", "box": "#232526", "border": "#333", "link": "#7fb3d5", "btn": "linear-gradient(90deg, #384e5a 0%, #213b4b 100%)"},
+}
+
+RESULTS_PAGE_SCRIPT = """
+<script>
+document.addEventListener("click", function (event) {
+    var btn = event.target.closest(".copy-material-btn");
+    if (!btn) { return; }
+    navigator.clipboard.writeText(document.getElementById(btn.dataset.target).innerText);
+    btn.classList.add("copied");
+    setTimeout(function () { btn.classList.remove("copied"); }, 1800);
+});
+</script>
+"""
+
+COPY_BUTTON_HTML = """
+<button class="copy-material-btn" data-target="plain_text_{i}">
+    <span class="copy-icon">
+        <svg width="20" height="20" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
+            <rect x="9" y="9" width="13" height="13" rx="2" ry="2"></rect>
+            <path d="M5 15H4a2 2 0 0 1-2-2V4a2 2 0 0 1 2-2h9a2 2 0 0 1 2 2v1"></path>
+        </svg>
+    </span>
+    <span>نسخ</span>
+    <span class="copied-check">
+        <svg width="20" height="20" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
+            <polyline points="20 6 9 17 4 12"></polyline>
+        </svg>
+        تم النسخ!
+    </span>
+</button>
+"""
+
+def estimate_result_height(corpus, article):
+    citation_rows = bool(len(cited_articles(corpus, article.id))) + bool(len(citing_articles(corpus, article.id)))
+    return 190 + 31 * sum(len(p) // 95 + 1 for p in article["paragraphs"]) + CITATIONS_ROW_HEIGHT * citation_rows
+
+def render_citations_html(corpus, article_id):
+    # Linked articles come from the precomputed citation graph and open in place.
+    parts = []
+    for label, ids in (
+        ("🔗 المواد المشار إليها", cited_articles(corpus, article_id)),
+        ("↩️ مواد تشير إلى هذه المادة", citing_articles(corpus, article_id)),
+    ):
+        if not len(ids):
+            continue
+        items = "".join(
+            f"""<details class="citation-item"><summary>المادة ({linked['num']}) من قانون {linked['law']}</summary>"""
+            f"""<p>{html.escape(linked['plain'])}</p></details>"""
+            for linked in (corpus["articles"][j] for j in ids[:CITATIONS_SHOWN])
+        )
+        if len(ids) > CITATIONS_SHOWN:
+            items += f"<div>... و{len(ids) - CITATIONS_SHOWN} مواد أخرى</div>"
+        parts.append(f'<details class="citations"><summary>{label} ({len(ids)})</summary>{items}</details>')
+    return "".join(parts)
+
+def render_results_page_html(corpus, articles, first_index, query):
+    parts = [RESULTS_PAGE_STYLE % RESULTS_PAGE_THEMES[bool(st.session_state.night_mode)]]
+    for offset, article in enumerate(articles):
+        i = first_index + offset
+        text = cached_highlight(article["plain"], query["keywords"], query["exact"]) if query["keywords"] else article["plain"]
+        parts.append(f"""
+        <details class="result-item" open>
+            <summary>📚 المادة ({article['num']}) من قانون {article['law']}</summary>
+            <div class="result-box-night"><p>{text}</p></div>
+            {render_citations_html(corpus, article.id)}
+            {COPY_BUTTON_HTML.format(i=i)}
+            <div id="plain_text_{i}" style="display:none;">{html.escape(article['plain'])}</div>
+        </details>
+        """)
+    parts.append(RESULTS_PAGE_SCRIPT)
+    return "".join(parts)
+
+def _jump_to_law(results, corpus, page_size):
+    law = st.session_state.results_jump_law
+    for pos, article_id in enumerate(results):
+        if corpus["articles"][article_id]["law"] == law:
+            st.session_state.results_page = pos // page_size
+            return
+
+def _change_results_page(delta):
+    st.session_state.results_page += delta
+
+def _change_results_page_size():
+    st.session_state.results_page = st.session_state.get("results_page_first", 0) // st.session_state.results_page_size
+
+def render_results_pages(corpus, results, query):
+    if "results_page_size" not in st.session_state:
+        st.session_state.results_page_size = RESULTS_PAGE_SIZES[1]
+    page_size = st.session_state.results_page_size
+    page_count = max(1, (len(results) + page_size - 1) // page_size)
+    page = min(max(st.session_state.get("results_page", 0), 0), page_count - 1)
+    st.session_state.results_page = page
+    laws_in_results = list(dict.fromkeys(corpus["articles"][i]["law"] for i in results))
+    nav_cols = st.columns([2, 1, 2, 1, 3])
+    with nav_cols[0]:
+        st.selectbox("عدد النتائج في الصفحة:", RESULTS_PAGE_SIZES, key="results_page_size", on_change=_change_results_page_size)
+    with nav_cols[1]:
+        st.button("➡️ السابق", key="results_prev_page", disabled=page == 0, on_click=_change_results_page, args=(-1,))
+    with nav_cols[2]:
+        st.markdown(
+            f"<div style='text-align:center;direction:rtl;padding-top:30px;'>صفحة {page + 1} من {page_count}</div>",
+            unsafe_allow_html=True,
+        )
+    with nav_cols[3]:
+        st.button("التالي ⬅️", key="results_next_page", disabled=page >= page_count - 1, on_click=_change_results_page, args=(1,))
+    with nav_cols[4]:
+        if len(laws_in_results) > 1:
+            st.selectbox(
+                "الانتقال إلى قانون:",
+                laws_in_results,
+                key="results_jump_law",
+                on_change=_jump_to_law,
+                args=(results, corpus, page_size),
+            )
+    first = page * page_size
+    st.session_state.results_page_first = first
+    page_articles = [corpus["articles"][i] for i in results[first:first + page_size]]
+    height = min(sum(estimate_result_height(corpus, a) for a in page_articles), RESULTS_FRAME_MAX_HEIGHT)
+    components.html(render_results_page_html(corpus, page_articles, first, query), height=height, scrolling=True)
+
+@st.fragment
+def render_live_search(corpus):
+    # Typing only reruns this fragment; a newer keystroke interrupts a run still in progress.
+    live_cols = st.columns([3, 1])
+    with live_cols[1]:
+        live_file = st.selectbox("القانون:", ["الكل"] + corpus["files"], key="live_file_select")
+    with live_cols[0]:
+        text = st.text_input(
+            "ابحث أثناء الكتابة:",
+            key="live_search_input",
+            type="search",
+            live=LIVE_SEARCH_DELAY,
+            placeholder="اكتب بداية الكلمة أو عدة كلمات...",
+        )
+    norm = normalize_arabic_text(text or "")
+    if len(norm) < LIVE_SEARCH_MIN_CHARS:
+        st.caption(f"اكتب {LIVE_SEARCH_MIN_CHARS} أحرف على الأقل لعرض النتائج.")
+        return
+    previous = st.session_state.get("live_search_state")
+    if previous is not None and previous.get("version") != corpus["version"]:
+        previous = None
+    state = prefix_search(corpus["index"], norm, previous)
+    state["version"] = corpus["version"]
+    st.session_state.live_search_state = state
+    hits = state["hits"]
+    if live_file != "الكل":
+        start, end = corpus["law_ranges"][live_file]
+        hits = [i for i in hits if start <= i < end]
+    results = sorted(hits)
+    query = {"version": corpus["version"], "keywords": tuple(t["token"] for t in state["terms"]), "exact": False, "total": len(results)}
+    st.markdown(f"<div style='direction:rtl;text-align:right;'>🔎 {len(results)} مادة مطابقة</div>", unsafe_allow_html=True)
+    if not results:
+        return
+    shown = [corpus["articles"][i] for i in results[:LIVE_RESULTS_SHOWN]]
+    height = min(sum(estimate_result_height(corpus, a) for a in shown), RESULTS_FRAME_MAX_HEIGHT)
+    components.html(render_results_page_html(corpus, shown, 0, query), height=height, scrolling=True)
+    if len(results) > LIVE_RESULTS_SHOWN and st.button(f"📚 عرض كل النتائج ({len(results)})", key="live_show_all"):
+        st.session_state.results = array("I", results)
+        st.session_state.results_query = query
+        st.session_state.results_page = 0
+        st.session_state.search_done = True
+        st.rerun()
+
+@st.fragment(run_every=1.0)
+def _poll_export_job(job):
+    if job.done():
+        st.rerun()
+    st.info("⏳ جاري تجهيز ملف Word...")
+
+def render_export_controls(corpus, results):
+    key = export_key(corpus["version"], results)
+    job = get_export_jobs().get(key)
+    st.markdown('<div class="rtl-download-btn">', unsafe_allow_html=True)
+    if job is None:
+        if st.button("📝 تجهيز ملف Word للنتائج", key="prepare_word_export"):
+            get_export_jobs().submit(key, [corpus["articles"][i] for i in results])
+            st.rerun()
+    elif not job.done():
+        _poll_export_job(job)
+    elif job.exception() is not None:
+        st.error(f"⚠️ تعذر إنشاء ملف Word: {job.exception()}")
+        if st.button("🔁 إعادة المحاولة", key="retry_word_export"):
+            get_export_jobs().submit(key, [corpus["articles"][i] for i in results])
+            st.rerun()
+    else:
+        st.download_button(
+            label="⬇️ تصدير النتائج إلى Word",
+            data=job.result(),
+            file_name="نتائج_البحث_القوانين_اليمنية.docx",
+            mime=DOCX_MIME,
+            key="download_button_word_main",
+            use_container_width=False
+        )
+    st.markdown('</div>', unsafe_allow_html=True)
+
+def render_batch_search(corpus):
+    st.markdown(
+        "<div style='direction: rtl; text-align: right;'>ابحث عن قائمة من المصطلحات دفعة واحدة: "
+        "مصطلح في كل سطر أو مفصولة بفواصل، أو ارفع ملفًا نصيًا بها.</div>",
+        unsafe_allow_html=True,
+    )
+    with st.form("batch_search_form"):
+        law_sel = st.selectbox("القانون:", ["الكل"] + corpus["files"], key="batch_file_select")
+        terms_text = st.text_area("المصطلحات:", key="batch_terms_input", height=150)
+        uploaded = st.file_uploader("أو ارفع ملف المصطلحات (txt أو csv):", type=["txt", "csv"], key="batch_terms_file")
+        option_cols = st.columns(2)
+        with option_cols[0]:
+            exact = st.checkbox("تطابق تام للكلمة", key="batch_exact_checkbox")
+        with option_cols[1]:
+            match_mode = st.selectbox("مطابقة الكلمات:", list(MATCH_MODES), key="batch_match_mode_select")
+        submitted = st.form_submit_button("🔍 بحث عن كل المصطلحات", use_container_width=True)
+    if submitted:
+        text = terms_text
+        if uploaded is not None:
+            text += "\n" + uploaded.getvalue().decode("utf-8-sig", errors="replace")
+        terms = parse_batch_terms(text)
+        if not terms:
+            st.warning("يرجى إدخال مصطلح واحد على الأقل.")
+            st.session_state.batch_results = None
+        else:
+            laws = None if law_sel == "الكل" else (law_sel,)
+            morphology = MATCH_MODES[match_mode]
+            with st.spinner("جاري البحث عن المصطلحات..."):
+                response = batch_search(corpus, terms, laws=laws, exact=exact, morphology=morphology)
+            # Only the counts are kept per session; the matrix is rebuilt when exported.
+            st.session_state.batch_results = {
+                "version": corpus["version"],
+                "terms": response.terms,
+                "options": (laws, exact, morphology),
+                "articles": array("I", (len(response.hits[t]) for t in response.terms)),
+                "occurrences": array("I", (sum(response.hits[t].values()) for t in response.terms)),
+                "warnings": response.warnings,
+            }
+    batch = st.session_state.get("batch_results")
+    if not batch or batch["version"] != corpus["version"]:
+        return
+    for warning in batch["warnings"]:
+        st.warning(warning)
+    st.dataframe(
+        [{"المصطلح": term, "عدد المواد": articles, "عدد المرات": occurrences}
+         for term, articles, occurrences in zip(batch["terms"], batch["articles"], batch["occurrences"])],
+        use_container_width=True,
+        hide_index=True,
+    )
+    render_batch_export_controls(corpus, batch)
+
+def render_batch_export_controls(corpus, batch):
+    keys = {
+        kind: batch_export_key(corpus["version"], batch["terms"], batch["options"], kind)
+        for kind in ("docx", "csv")
+    }
+    jobs = {kind: get_export_jobs().get(key) for kind, key in keys.items()}
+    if any(job is None or (job.done() and job.exception() is not None) for job in jobs.values()):
+        failed = [job.exception() for job in jobs.values() if job is not None and job.done() and job.exception()]
+        if failed:
+            st.error(f"⚠️ تعذر إنشاء ملف التصدير: {failed[0]}")
+        if st.button("📝 تجهيز ملفات Word و CSV للمصفوفة", key="prepare_batch_export"):
+            for kind, key in keys.items():
+                get_export_jobs().submit_export(
+                    key, export_batch_matrix, corpus, batch["terms"], *batch["options"], kind == "docx"
+                )
+            st.rerun()
+    elif not all(job.done() for job in jobs.values()):
+        _poll_export_job(jobs["docx"] if not jobs["docx"].done() else jobs["csv"])
+    else:
+        download_cols = st.columns(2)
+        with download_cols[0]:
+            st.download_button(
+                "⬇️ تصدير المصفوفة إلى Word", jobs["docx"].result(), file_name="مصفوفة_البحث_المتعدد.docx",
+                mime=DOCX_MIME, key="download_batch_word",
+            )
+        with download_cols[1]:
+            st.download_button(
+                "⬇️ تصدير المصفوفة إلى CSV", jobs["csv"].result(), file_name="مصفوفة_البحث_المتعدد.csv",
+                mime=CSV_MIME, key="download_batch_csv",
+            )
 
 def run_main_app():
     with st.sidebar:
@@ -229,7 +638,7 @@ def run_main_app():
                 """,
                 unsafe_allow_html=True,
             )
-    tabs = st.tabs(["🔎 البحث في القوانين", "📄 عرض القانون الكامل"])
+    tabs = st.tabs(["🔎 البحث في القوانين", "📄 عرض القانون الكامل", "🗂️ بحث متعدد"])
     with tabs[0]:
         if st.session_state.night_mode:
             st.markdown("""
@@ -367,10 +776,13 @@ def run_main_app():
         if not os.path.exists(LAWS_DIR):
             st.error(f"⚠️ مجلد '{LAWS_DIR}/' غير موجود. يرجى التأكد من وجود ملفات القوانين.")
             return
-        files = [f for f in os.listdir(LAWS_DIR) if f.endswith(".docx")]
+        corpus = get_corpus_store().snapshot()
+        files = corpus["files"]
         if not files:
             st.warning(f"📂 لا توجد ملفات قوانين في مجلد '{LAWS_DIR}/'.")
             return
+        if st.toggle("⚡ البحث الفوري أثناء الكتابة", key="live_search_toggle"):
+            render_live_search(corpus)
         st.markdown("""
             <div style="direction: rtl; text-align: right;">
             <h3 style="display: flex; align-items: center; gap: 10px;">🔎 نموذج البحث</h3>
@@ -384,7 +796,11 @@ def run_main_app():
             keywords_form = st.text_area(
                 "",
                 key="main_keywords_input",
-                help="أدخل الكلمات التي تريد البحث عنها، وافصل بينها بفاصلة إذا كانت أكثر من كلمة.",
+                help=(
+                    "أدخل الكلمات التي تريد البحث عنها، وافصل بينها بفاصلة إذا كانت أكثر من كلمة. "
+                    "للبحث المتقدم: AND للجمع، OR للتخيير، NOT أو - للاستبعاد، \"...\" لعبارة، "
+                    "NEAR/5 لكلمتين بينهما 5 كلمات على الأكثر، والأقواس للتجميع."
+                ),
             )
             st.markdown('</div>', unsafe_allow_html=True)
             st.markdown('<div style="direction: rtl; text-align: right;">أو أبحث برقم المادة:</div>', unsafe_allow_html=True)
@@ -392,12 +808,20 @@ def run_main_app():
             article_number_input = st.text_input(
                 "",
                 key="article_number_input",
-                help="أدخل رقم المادة للبحث عنها مباشرة (يمكن استخدام أرقام عربية أو إنجليزية)."
+                help="أدخل رقم المادة للبحث عنها مباشرة (يمكن استخدام أرقام عربية أو إنجليزية، أو عدة أرقام مفصولة بفاصلة، أو نطاقًا مثل 10-15)."
             )
             st.markdown('</div>', unsafe_allow_html=True)
             advanced_search_col = st.columns([1, 2, 5])
+            with advanced_search_col[1]:
+                sort_order = st.radio("ترتيب النتائج:", RESULT_SORT_ORDERS, key="results_sort_order", horizontal=True)
             with advanced_search_col[2]:
                 exact_match = st.checkbox("تطابق تام للكلمة", key="exact_match_checkbox")
+                match_mode = st.selectbox(
+                    "مطابقة الكلمات:",
+                    list(MATCH_MODES),
+                    key="match_mode_select",
+                    help="بالجذر: تطابق العقد والعقود وبالعقد وعقدين. تقريبي: يتجاوز أيضًا خطأً إملائيًا واحدًا.",
+                )
             search_btn_col = st.columns([1, 2, 12])
             with search_btn_col[2]:
                 submitted = st.form_submit_button("🔍 بدء البحث", use_container_width=True)
@@ -405,207 +829,116 @@ def run_main_app():
             st.session_state.results = []
         if "search_done" not in st.session_state:
             st.session_state.search_done = False
+        query = None
         if submitted:
-            results = []
-            search_files = files if selected_file_form == "الكل" else [selected_file_form]
-            kw_list = [k.strip() for k in keywords_form.split(",") if k.strip()] if keywords_form else []
-            search_by_article = bool(article_number_input.strip())
-            normalized_kw_list = [normalize_arabic_text(kw) for kw in kw_list] if kw_list else []
-            norm_article = normalize_arabic_numbers(article_number_input.strip()) if search_by_article else ""
+            ranked = sort_order == RESULT_SORT_ORDERS[1]
+            try:
+                query = build_query(
+                    keywords_form,
+                    laws=None if selected_file_form == "الكل" else [selected_file_form],
+                    exact=exact_match,
+                    article=article_number_input,
+                    order=ORDER_RELEVANCE if ranked else ORDER_DOCUMENT,
+                    limit=RANKED_RESULTS_LIMIT if ranked else None,
+                    morphology=MATCH_MODES[match_mode],
+                )
+            except QuerySyntaxError as e:
+                st.error(f"⚠️ صيغة البحث غير صحيحة: {e}")
+        if query is not None:
             with st.spinner("جاري البحث في القوانين... قد يستغرق الأمر بعض الوقت."):
-                for file in search_files:
-                    try:
-                        doc = Document(os.path.join(LAWS_DIR, file))
-                    except Exception as e:
-                        st.warning(f"⚠️ تعذر قراءة الملف {file}: {e}. يرجى التأكد من أنه ملف DOCX صالح.")
-                        continue
-                    law_name = file.replace(".docx", "")
-                    last_article = "غير معروفة"
-                    current_article_paragraphs = []
-                    for para in doc.paragraphs:
-                        txt = para.text.strip()
-                        if not txt:
-                            continue
-                        match = re.match(r"مادة\s*[\(]?\s*(\d+)[\)]?", txt)
-                        if match:
-                            if current_article_paragraphs:
-                                full_text = "\n".join(current_article_paragraphs)
-                                add_result = False
-                                simple_full_text = normalize_arabic_text(full_text)
-                                if search_by_article and normalize_arabic_numbers(last_article) == norm_article:
-                                    add_result = True
-                                elif normalized_kw_list:
-                                    for idx, kw in enumerate(normalized_kw_list):
-                                        if not kw:
-                                            continue
-                                        if exact_match:
-                                            pattern = r'(?<!\w)'+re.escape(kw)+r'(?!\w)'
-                                            if re.search(pattern, simple_full_text):
-                                                add_result = True
-                                                break
-                                        else:
-                                            if kw in simple_full_text:
-                                                add_result = True
-                                                break
-                                if add_result:
-                                    highlighted = highlight_keywords(full_text, kw_list, normalized_keywords=normalized_kw_list, exact_match=exact_match) if kw_list else full_text
-                                    results.append({
-                                        "law": law_name,
-                                        "num": last_article,
-                                        "text": highlighted,
-                                        "plain": full_text
-                                    })
-                                current_article_paragraphs = []
-                            last_article = match.group(1)
-                        current_article_paragraphs.append(txt)
-                    if current_article_paragraphs:
-                        full_text = "\n".join(current_article_paragraphs)
-                        add_result = False
-                        simple_full_text = normalize_arabic_text(full_text)
-                        if search_by_article and normalize_arabic_numbers(last_article) == norm_article:
-                            add_result = True
-                        elif normalized_kw_list:
-                            for idx, kw in enumerate(normalized_kw_list):
-                                if not kw:
-                                    continue
-                                if exact_match:
-                                    pattern = r'(?<!\w)'+re.escape(kw)+r'(?!\w)'
-                                    if re.search(pattern, simple_full_text):
-                                        add_result = True
-                                        break
-                                else:
-                                    if kw in simple_full_text:
-                                        add_result = True
-                                        break
-                        if add_result:
-                            highlighted = highlight_keywords(full_text, kw_list, normalized_keywords=normalized_kw_list, exact_match=exact_match) if kw_list else full_text
-                            results.append({
-                                "law": law_name,
-                                "num": last_article,
-                                "text": highlighted,
-                                "plain": full_text
-                            })
-            st.session_state.results = results
+                response = cached_run_query(corpus, query, get_query_cache())
+            for warning in response.warnings:
+                st.warning(warning)
+            results = response.article_ids
+            total_hits = response.total
+            # Only article ids are kept per session; texts are read from the shared corpus.
+            st.session_state.results = array("I", results)
+            highlight_keywords, highlight_exact = highlight_terms(corpus, query)
+            st.session_state.results_query = {
+                "version": corpus["version"],
+                "keywords": highlight_keywords,
+                "exact": highlight_exact,
+                "total": total_hits,
+            }
+            st.session_state.results_page = 0
             st.session_state.search_done = True
             if not results:
                 st.info("لم يتم العثور على نتائج مطابقة للبحث.")
+        if st.session_state.get("search_done", False) and st.session_state.get("results_query", {}).get("version") != corpus["version"]:
+            st.session_state.results = []
+            st.session_state.search_done = False
         if st.session_state.get("search_done", False) and st.session_state.results:
             st.markdown("<h2 style='text-align: center; color: #388E3C;'>نتائج البحث في القوانين 📚</h2>", unsafe_allow_html=True)
             st.markdown("---")
         if st.session_state.get("search_done", False):
             results = st.session_state.results
-            unique_laws = sorted(set(r["law"] for r in results))
+            unique_laws = sorted(set(corpus["articles"][i]["law"] for i in results))
             st.markdown('<div class="rtl-metric">', unsafe_allow_html=True)
-            st.metric(label="📊 إجمالي النتائج التي تم العثور عليها", value=f"{len(results)}", delta=f"في {len(unique_laws)} قانون/ملف")
+            st.metric(label="📊 إجمالي النتائج التي تم العثور عليها", value=f"{st.session_state.results_query.get('total', len(results))}", delta=f"في {len(unique_laws)} قانون/ملف")
             st.markdown('</div>', unsafe_allow_html=True)
+            if len(results) < st.session_state.results_query.get("total", len(results)):
+                st.caption(f"تم ترتيب النتائج حسب الصلة وعرض أعلى {len(results)} نتيجة من أصل {st.session_state.results_query['total']}.")
             if results:
-                export_data = export_results_to_word(results)
-                st.markdown('<div class="rtl-download-btn">', unsafe_allow_html=True)
-                st.download_button(
-                    label="⬇️ تصدير النتائج إلى Word",
-                    data=export_data,
-                    file_name="نتائج_البحث_القوانين_اليمنية.docx",
-                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                    key="download_button_word_main",
-                    use_container_width=False
-                )
-                st.markdown('</div>', unsafe_allow_html=True)
+                render_export_controls(corpus, results)
             else:
                 st.warning("لا توجد نتائج لتصديرها.")
             st.markdown("---")
             if results:
-                for i, r in enumerate(results):
-                    with st.expander(f"📚 المادة ({r['num']}) من قانون {r['law']}", expanded=True):
-                        st.markdown(f'''
-                        <div class="result-box-night">
-                            <p style="font-size:17px;line-height:1.8;margin-top:0px;">
-                                {r["text"]}
-                            </p>
-                        </div>
-                        ''', unsafe_allow_html=True)
-                        components.html(f"""
-                            <style>
-                            .copy-material-btn {{
-                                display: inline-flex;
-                                align-items: center;
-                                gap: 10px;
-                                background: linear-gradient(90deg, #1abc9c 0%, #2980b9 100%);
-                                color: #fff;
-                                border: none;
-                                border-radius: 30px;
-                                font-size: 18px;
-                                font-family: 'Cairo', 'Tajawal', sans-serif;
-                                padding: 10px 22px;
-                                cursor: pointer;
-                                box-shadow: 0 4px 15px rgba(41, 128, 185, 0.4);
-                                transition: all 0.3s ease;
-                                margin-bottom: 10px;
-                                direction: rtl;
-                                white-space: nowrap;
-                            }}
-                            .copy-material-btn:hover {{
-                                background: linear-gradient(90deg, #2980b9 0%, #1abc9c 100%);
-                                box-shadow: 0 6px 20px rgba(41, 128, 185, 0.6);
-                                transform: translateY(-2px);
-                            }}
-                            .copy-material-btn .copy-icon {{
-                                font-size: 20px;
-                                margin-left: 8px;
-                                display: block;
-                            }}
-                            .copy-material-btn .copied-check {{
-                                font-size: 20px;
-                                color: #fff;
-                                margin-left: 8px;
-                                display: none;
-                            }}
-                            .copy-material-btn.copied .copy-icon {{
-                                display: none;
-                            }}
-                            .copy-material-btn.copied .copied-check {{
-                                display: inline;
-                                animation: fadein-check 0.5s ease-out;
-                            }}
-                            @keyframes fadein-check {{
-                                0% {{ opacity: 0; transform: scale(0.7); }}
-                                100% {{ opacity: 1; transform: scale(1); }}
-                            }}
-                            </style>
-                            <button class="copy-material-btn" id="copy_btn_{i}_{r['law']}_{r['num']}" onclick="
-                                navigator.clipboard.writeText(document.getElementById('plain_text_{i}_{r['law']}_{r['num']}').innerText);
-                                var btn = document.getElementById('copy_btn_{i}_{r['law']}_{r['num']}');
-                                btn.classList.add('copied');
-                                setTimeout(function(){{
-                                    btn.classList.remove('copied');
-                                }}, 1800);
-                            ">
-                                <span class="copy-icon">
-                                    <svg width="20" height="20" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
-                                        <rect x="9" y="9" width="13" height="13" rx="2" ry="2"></rect>
-                                        <path d="M5 15H4a2 2 0 0 1-2-2V4a2 2 0 0 1 2-2h9a2 2 0 0 1 2 2v1"></path>
-                                    </svg>
-                                </span>
-                                <span>نسخ</span>
-                                <span class="copied-check">
-                                    <svg width="20" height="20" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
-                                        <polyline points="20 6 9 17 4 12"></polyline>
-                                    </svg>
-                                    تم النسخ!
-                                </span>
-                            </button>
-                            <div id="plain_text_{i}_{r['law']}_{r['num']}" style="display:none;">{html.escape(r['plain'])}</div>
-                        """, height=60)
+                with timed("render_results"):
+                    render_results_pages(corpus, results, st.session_state.results_query)
             else:
                 st.info("لا توجد نتائج لعرضها حاليًا. يرجى إجراء بحث جديد.")
     with tabs[1]:
         if not os.path.exists(LAWS_DIR):
             st.error(f"⚠️ مجلد '{LAWS_DIR}/' غير موجود. يرجى التأكد من وجود ملفات القوانين.")
             return
-        files = [f for f in os.listdir(LAWS_DIR) if f.endswith(".docx")]
-        if not files:
+        corpus = get_corpus_store().snapshot()
+        if not corpus["files"]:
             st.warning(f"📂 لا توجد ملفات قوانين في مجلد '{LAWS_DIR}/'.")
             return
-        render_law_file_viewer(files)
+        render_law_file_viewer(corpus)
+    with tabs[2]:
+        if not os.path.exists(LAWS_DIR):
+            st.error(f"⚠️ مجلد '{LAWS_DIR}/' غير موجود. يرجى التأكد من وجود ملفات القوانين.")
+            return
+        corpus = get_corpus_store().snapshot()
+        if not corpus["files"]:
+            st.warning(f"📂 لا توجد ملفات قوانين في مجلد '{LAWS_DIR}/'.")
+            return
+        render_batch_search(corpus)
+    if st.query_params.get("admin") == "metrics" and is_admin_request():
+        render_admin_panel()
+
+def is_admin_request():
+    # The panel is off unless the operator sets LAW_ADMIN_TOKEN; the URL must then carry ?token=<same value>.
+    expected = os.environ.get(ADMIN_TOKEN_ENV, "")
+    given = st.query_params.get("token", "")
+    return bool(expected) and hmac.compare_digest(given.encode("utf-8"), expected.encode("utf-8"))
+
+def render_admin_panel():
+    # Opened with ?admin=metrics&token=<LAW_ADMIN_TOKEN>.
+    with st.expander("📈 مؤشرات الأداء", expanded=True):
+        st.dataframe(METRICS.stage_summary(), use_container_width=True)
+        stats = get_query_cache().stats()
+        st.caption(
+            f"ذاكرة نتائج البحث: {stats['entries']} مدخل، {stats['hits']} إصابة، {stats['misses']} إخفاق "
+            f"(نسبة الإصابة {stats['hit_rate']:.0%})"
+        )
+        st.code(METRICS.render_prometheus(), language="text")
+        profile_text = st.text_input("تحليل استعلام بـ cProfile:", key="admin_profile_query")
+        if st.button("تشغيل التحليل", key="admin_profile_run") and profile_text.strip():
+            corpus = get_corpus_store().snapshot()
+            try:
+                query = build_query(profile_text, order=ORDER_RELEVANCE)
+            except QuerySyntaxError as e:
+                st.error(str(e))
+                return
+            dump_path = os.path.join(tempfile.gettempdir(), "law_search_query.prof")
+            response, report = profile_query(corpus, query, dump_path)
+            st.caption(f"{response.total} نتيجة")
+            st.code(report, language="text")
+            with open(dump_path, "rb") as f:
+                st.download_button("تنزيل ملف التحليل (.prof)", f.read(), file_name="law_search_query.prof")
 
 def render_header():
     if os.path.exists("header.html"):
@@ -639,7 +972,11 @@ def main():
     with st.container(border=True):
         st.markdown("<h3 style='text-align:center; color:#2c3e50;'>🔐 النسخة المدفوعة</h3>", unsafe_allow_html=True)
         code = st.text_input("أدخل كود التفعيل هنا:", key="activation_code_input", help="أدخل الكود الذي حصلت عليه لتفعيل النسخة الكاملة.")
-        if st.button("✅ تفعيل الآن", key="activate_button", use_container_width=True):
+        codes_loaded = get_license_store().has_codes()
+        if not codes_loaded:
+            # Not the customer's fault: the operator has not run "python license_store.py migrate".
+            st.error("⚠️ التفعيل غير متاح حاليًا: لم يتم تحميل أكواد التفعيل على الخادم. يرجى التواصل مع الدعم الفني.")
+        if st.button("✅ تفعيل الآن", key="activate_button", use_container_width=True, disabled=not codes_loaded):
             if code and activate_app(code.strip()):
                 st.success("✅ تم التفعيل بنجاح! يرجى إعادة تشغيل التطبيق لتطبيق التغييرات.")
                 st.stop()
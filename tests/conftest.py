@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from law_corpus import load_corpus  # noqa: E402
+from law_index import build_index  # noqa: E402
+
+LAWS_DIR = os.path.join(ROOT, "laws")
+
+
+@pytest.fixture(scope="session")
+def corpus(tmp_path_factory):
+    """The bundled laws, parsed into a throwaway corpus cache and indexed."""
+    corpus = load_corpus(LAWS_DIR, str(tmp_path_factory.mktemp("corpus") / "corpus.db"))
+    corpus["index"] = build_index(corpus["articles"])
+    return corpus
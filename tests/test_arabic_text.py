@@ -0,0 +1,94 @@
+import random
+import re
+
+import pytest
+
+from arabic_text import arabic_stems, normalize_arabic_text, normalize_arabic_text_with_offsets
+
+
+def legacy_normalize_arabic_text(text):
+    # The chained re.sub normalizer the translate table replaced, with hamza carriers now folded to ء.
+    text = re.sub(r'(.)\1{2,}', r'\1', text)
+    text = re.sub(r'[\u064B-\u0652]', '', text)
+    text = re.sub('[إأآا]', 'ا', text)
+    text = re.sub('[ىي]', 'ي', text)
+    text = re.sub('[ة]', 'ه', text)
+    text = re.sub('[ؤئ]', 'ء', text)
+    text = re.sub(r'[^\w\s]', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+def synthetic_samples(count, seed=0):
+    rng = random.Random(seed)
+    alphabet = "ابتةثجحخدذرزسشصضطظعغفقكلمنهويىءآأإؤئ" + "ًٌٍَُِّْ" + "٠١٢٣٤٥٦٧٨٩0123456789" + " \n\t " + ".,:؛،()-«»\"'_" + "😀𝟙𐍈"
+    for _ in range(count):
+        chars = []
+        for _ in range(rng.randint(0, 80)):
+            chars.append(rng.choice(alphabet) * rng.choice((1, 1, 1, 2, 3, 4)))
+        yield "".join(chars)
+
+
+def assert_equivalent(text):
+    expected = legacy_normalize_arabic_text(text)
+    assert normalize_arabic_text(text) == expected
+    norm, offsets, ends = normalize_arabic_text_with_offsets(text)
+    assert norm == expected
+    assert len(offsets) == len(ends) == len(norm)
+    assert all(a < b for a, b in zip(offsets, offsets[1:]))
+    assert all(a < b <= c for a, b, c in zip(offsets, ends, offsets[1:]))
+
+
+@pytest.mark.parametrize("text", [
+    "", "   ", "مادة (1):", "الإجراءاتُ الجزائيةُ", "عقدددد البيع", "٣٤٥ و 12", "مسؤول، شيء؛ «قائم»",
+    "😀 نص 𝟙 مع رموز", "\tسطر\nجديد  ", "ـــــ", "ياااا",
+])
+def test_normalizer_matches_legacy(text):
+    assert_equivalent(text)
+
+
+def test_normalizer_matches_legacy_on_synthetic_text():
+    for text in synthetic_samples(5000):
+        assert_equivalent(text)
+
+
+def test_normalizer_matches_legacy_on_corpus(corpus):
+    for article in corpus["articles"]:
+        assert_equivalent(article["plain"])
+        for paragraph in article["paragraphs"]:
+            assert_equivalent(paragraph)
+
+
+def test_offsets_point_at_source_characters():
+    text = "قَالَ: الإِجَارَةُ — عَقْدٌ"
+    norm, offsets, ends = normalize_arabic_text_with_offsets(text)
+    for ch, offset, end in zip(norm, offsets, ends):
+        if ch != " ":
+            assert normalize_arabic_text(text[offset:end]) == ch
+
+
+def test_offsets_cover_collapsed_runs():
+    norm, offsets, ends = normalize_arabic_text_with_offsets("ابببب جج")
+    assert norm == "اب جج"
+    assert list(zip(offsets, ends)) == [(0, 1), (1, 5), (5, 6), (6, 7), (7, 8)]
+
+
+def test_hamza_carriers_fold_together():
+    assert normalize_arabic_text("مسؤولية") == normalize_arabic_text("مسئولية") == "مسءوليه"
+
+
+@pytest.mark.parametrize("words, stem", [
+    (("عقد", "العقود", "بالعقد", "عقدين", "بعقد", "لعقد", "والعقد", "وبالعقد"), "عقد"),
+    (("وصيه", "الوصيه", "والوصيه", "بالوصيه"), "وص"),
+    (("وكاله", "الوكاله", "الوكيل"), "وكل"),
+    (("ورثه", "الورثه", "الوارث"), "ورث"),
+    (("حكم", "بحكم", "للحكم", "والحكم"), "حكم"),
+])
+def test_inflections_share_a_stem(words, stem):
+    for word in words:
+        assert stem in arabic_stems(word), word
+
+
+def test_short_words_keep_their_first_letter():
+    assert arabic_stems("بيع") == ("بيع",)
+    assert arabic_stems("فسخ") == ("فسخ",)
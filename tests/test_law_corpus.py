@@ -0,0 +1,13 @@
+import os
+
+import pytest
+from docx import Document
+
+from conftest import LAWS_DIR
+from law_corpus import iter_docx_paragraphs, list_law_files
+
+
+@pytest.mark.parametrize("file", list_law_files(LAWS_DIR))
+def test_iterparse_matches_python_docx(file):
+    path = os.path.join(LAWS_DIR, file)
+    assert list(iter_docx_paragraphs(path)) == [p.text for p in Document(path).paragraphs]
@@ -0,0 +1,21 @@
+from arabic_text import normalize_arabic_text
+from law_highlight import find_keyword_spans, highlight_keywords
+
+
+def test_hamza_spelling_variants_are_marked():
+    text = "تقع المسئولية على المؤجر"
+    assert highlight_keywords(text, (normalize_arabic_text("مسؤولية"),)) == (
+        'تقع ال<mark class="mark-soft">مسئولية</mark> على المؤجر'
+    )
+
+
+def test_mark_covers_a_collapsed_repeat_run():
+    assert highlight_keywords("ابببب", ("اب",)) == "<mark>ابببب</mark>"
+
+
+def test_mark_keeps_trailing_tashkeel():
+    assert find_keyword_spans("عَقْدٌ باطل", ("عقد",), exact_match=True) == [(0, 6, "exact")]
+
+
+def test_overlapping_hits_merge():
+    assert find_keyword_spans("عقد البيع", ("عقد البيع", "البيع")) == [(0, 9, "exact")]
@@ -0,0 +1,47 @@
+import pytest
+
+from arabic_text import arabic_stems, normalize_arabic_text
+from law_index import MATCH_FUZZY, MATCH_STEM, batch_keyword_occurrences, find_keywords, keyword_occurrences
+
+WORDS = ["عقد", "وصية", "وكالة", "الورثة", "ورثة", "بيع", "إيجار", "حكم", "لجنة", "العقود", "عقد البيع"]
+
+
+@pytest.mark.parametrize("morphology", [MATCH_STEM, MATCH_FUZZY])
+@pytest.mark.parametrize("exact", [False, True])
+@pytest.mark.parametrize("word", WORDS)
+def test_morphology_never_loses_matches(corpus, word, exact, morphology):
+    index = corpus["index"]
+    kw = normalize_arabic_text(word)
+    assert find_keywords(index, [kw], exact) <= find_keywords(index, [kw], exact, morphology)
+
+
+def test_stem_finds_proclitic_forms(corpus):
+    index = corpus["index"]
+    with_ba = find_keywords(index, ["بعقد"], exact_match=True)
+    assert with_ba
+    assert with_ba <= find_keywords(index, ["عقد"], morphology=MATCH_STEM)
+
+
+def test_fuzzy_tolerates_a_typo(corpus):
+    index = corpus["index"]
+    assert find_keywords(index, ["المستاجر"], exact_match=True) <= find_keywords(
+        index, ["المستاجز"], morphology=MATCH_FUZZY
+    )
+
+
+@pytest.mark.parametrize("typo, word", [("مسولية", "مسؤولية"), ("المحكمت", "المحكمة")])
+def test_fuzzy_corrects_a_typo_whose_stem_exists(corpus, typo, word):
+    index = corpus["index"]
+    typo, word = normalize_arabic_text(typo), normalize_arabic_text(word)
+    # The typo stems to an unrelated word that does occur in the corpus.
+    assert any(stem in index["stems"] for stem in arabic_stems(typo))
+    assert find_keywords(index, [word], exact_match=True) <= find_keywords(index, [typo], morphology=MATCH_FUZZY)
+
+
+@pytest.mark.parametrize("morphology", [None, MATCH_STEM])
+def test_batch_occurrences_match_single_lookups(corpus, morphology):
+    index = corpus["index"]
+    keywords = [normalize_arabic_text(w) for w in WORDS]
+    batch = batch_keyword_occurrences(index, keywords, morphology=morphology)
+    for kw in keywords:
+        assert batch[kw] == keyword_occurrences(index, kw, morphology=morphology)
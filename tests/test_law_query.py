@@ -0,0 +1,51 @@
+import pytest
+
+from law_index import find_substring
+from law_query import QuerySyntaxError, evaluate_query, is_boolean_query, parse_query, query_terms
+
+
+@pytest.mark.parametrize("text, tree", [
+    ("ايجار AND فسخ", ("and", ("term", "ايجار"), ("term", "فسخ"))),
+    ("ايجار OR بيع , هبة", ("or", ("term", "ايجار"), ("term", "بيع"), ("term", "هبه"))),
+    ("عقد NOT بيع", ("and", ("term", "عقد"), ("not", ("term", "بيع")))),
+    ("عقد -بيع", ("and", ("term", "عقد"), ("not", ("term", "بيع")))),
+    ("-بيع عقد", ("and", ("not", ("term", "بيع")), ("term", "عقد"))),
+    ("عقد البيع -منقول", ("and", ("term", "عقد البيع"), ("not", ("term", "منقول")))),
+    ('"عقد البيع"', ("term", "عقد البيع")),
+    ("مؤجر NEAR/5 مستأجر", ("near", 5, ("term", "مءجر"), ("term", "مستاجر"))),
+    ("(ايجار OR بيع) AND -منقول", ("and", ("or", ("term", "ايجار"), ("term", "بيع")), ("not", ("term", "منقول")))),
+])
+def test_parse_query(text, tree):
+    assert parse_query(text) == tree
+
+
+@pytest.mark.parametrize("text", ["", "AND", "(عقد", "عقد)", '""', "عقد NEAR/3 (بيع OR هبة)"])
+def test_parse_query_rejects_malformed(text):
+    with pytest.raises(QuerySyntaxError):
+        parse_query(text)
+
+
+def test_is_boolean_query():
+    assert is_boolean_query("عقد -بيع")
+    assert is_boolean_query('"عقد البيع"')
+    assert not is_boolean_query("عقد البيع, الإيجار")
+
+
+def test_query_terms_skip_negated():
+    assert query_terms(parse_query("عقد -بيع OR ايجار")) == ["عقد", "ايجار"]
+
+
+def test_minus_excludes_a_word(corpus):
+    index = corpus["index"]
+    expected = find_substring(index, "عقد") - find_substring(index, "بيع")
+    assert expected
+    assert evaluate_query(index, parse_query("عقد -بيع")) == expected
+    assert evaluate_query(index, parse_query("-بيع عقد")) == expected
+    assert evaluate_query(index, parse_query("عقد AND NOT بيع")) == expected
+
+
+def test_and_or_match_set_algebra(corpus):
+    index = corpus["index"]
+    a, b = find_substring(index, "ايجار"), find_substring(index, "فسخ")
+    assert evaluate_query(index, parse_query("ايجار AND فسخ")) == a & b
+    assert evaluate_query(index, parse_query("ايجار OR فسخ")) == a | b
@@ -0,0 +1,34 @@
+import csv
+import io
+
+import pytest
+
+from law_index import MATCH_STEM
+from law_search import batch_matrix_rows, batch_search, build_query, export_batch_matrix, parse_batch_terms, run_query
+
+TERMS = ["إيجار", "عقد البيع", "الحضانة", "كلمةغيرموجودة", "مح"]
+
+
+def test_parse_batch_terms():
+    assert parse_batch_terms("إيجار، ايجار\nعقد البيع; فسخ,\n\n") == ["إيجار", "عقد البيع", "فسخ"]
+
+
+@pytest.mark.parametrize("options", [{}, {"exact": True}, {"morphology": MATCH_STEM}])
+def test_batch_search_matches_run_query(corpus, options):
+    response = batch_search(corpus, TERMS, **options)
+    for term in TERMS:
+        assert list(response.hits[term]) == run_query(corpus, build_query(term, **options)).article_ids
+
+
+def test_batch_search_restricted_to_a_law(corpus):
+    laws = [corpus["files"][0]]
+    response = batch_search(corpus, TERMS, laws=laws)
+    for term in TERMS:
+        assert list(response.hits[term]) == run_query(corpus, build_query(term, laws=laws)).article_ids
+
+
+def test_matrix_csv_lists_every_hit(corpus):
+    response = batch_search(corpus, TERMS)
+    rows = list(csv.reader(io.StringIO(export_batch_matrix(corpus, TERMS).decode("utf-8-sig"))))
+    assert rows[1:] == [[term, law, num, str(count)] for term, law, num, count in batch_matrix_rows(corpus, response)]
+    assert len(rows) - 1 == sum(len(hits) for hits in response.hits.values())
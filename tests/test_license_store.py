@@ -0,0 +1,60 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from license_store import LicenseStore, migrate
+
+
+def write(path, text):
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_migrate_imports_and_removes_the_codes_file(tmp_path):
+    db = str(tmp_path / "license.db")
+    codes = write(tmp_path / "codes.txt", "AAA\nBBB\n\n")
+    trials = write(tmp_path / "trials.txt", "dev1,100.0\ndev1,50.0\ndev2,200.0\n")
+    assert not LicenseStore(db).has_codes()
+    assert migrate(db, codes, trials) == (2, 3)
+    assert not os.path.exists(codes) and os.path.exists(trials)
+    store = LicenseStore(db)
+    assert store.has_codes()
+    assert store.stats() == {"codes": 2, "redeemed": 0, "trials": 2}
+    assert store.trial_start("dev1") == 50.0
+
+
+def test_trials_are_imported_at_startup(tmp_path):
+    db = str(tmp_path / "license.db")
+    trials = write(tmp_path / "trials.txt", "dev1,100.0\n")
+    store = LicenseStore(db, trials)
+    assert store.trial_start("dev1") == 100.0
+    assert store.register_trial("dev1") == 100.0
+    # An expired trial stays expired when the file is read again, even with a later row.
+    write(tmp_path / "trials.txt", "dev1,100.0\ndev1,900.0\n")
+    assert LicenseStore(db, trials).trial_start("dev1") == 100.0
+
+
+def test_code_is_redeemed_once(tmp_path):
+    db = str(tmp_path / "license.db")
+    migrate(db, write(tmp_path / "codes.txt", "AAA\n"), str(tmp_path / "missing.txt"))
+    store = LicenseStore(db)
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda i: store.redeem_code("AAA", f"dev{i}"), range(8)))
+    assert results.count(True) == 1
+    assert not store.redeem_code("CCC")
+
+
+def test_reimport_keeps_redeemed_state(tmp_path):
+    db = str(tmp_path / "license.db")
+    migrate(db, write(tmp_path / "codes.txt", "AAA\n"), str(tmp_path / "missing.txt"))
+    assert LicenseStore(db).redeem_code("AAA")
+    migrate(db, write(tmp_path / "codes.txt", "AAA\nBBB\n"), str(tmp_path / "missing.txt"))
+    store = LicenseStore(db)
+    assert not store.redeem_code("AAA")
+    assert store.stats()["codes"] == 2
+
+
+def test_trial_start_is_kept(tmp_path):
+    store = LicenseStore(str(tmp_path / "license.db"))
+    assert store.trial_start("dev") is None
+    first = store.register_trial("dev")
+    assert store.register_trial("dev") == first == store.trial_start("dev")